@@ -0,0 +1,118 @@
+import sys
+from argparse import ArgumentParser
+from logging import getLogger
+
+from common.utils import BROADCAST_FORMATS, JSON_FORMAT
+from simulation.benchmark import (
+    DEFAULT_BENCHMARK_TICKS,
+    DEFAULT_MAX_REGRESSION,
+    format_results,
+    get_regressions,
+    load_results,
+    run_benchmark,
+    save_results,
+)
+from simulation.headless_session import BOT_PLAYER, PLAYER_KINDS
+from utils.configure_logging import setup_logging
+
+logger = getLogger()
+
+
+def main():
+    cmd_args = get_cmd_args()
+    setup_logging(cmd_args.log_level)
+    results = run_benchmark(
+        cmd_args.blocks_numbers,
+        cmd_args.guards_numbers,
+        cmd_args.players_numbers,
+        ticks_number=cmd_args.ticks_number,
+        player_kind=cmd_args.player_kind,
+        broadcast_format=cmd_args.broadcast_format,
+        random_seed=cmd_args.random_seed,
+    )
+    print(format_results(results))
+    if cmd_args.output:
+        save_results(results, cmd_args.output)
+
+    if cmd_args.baseline:
+        regressions = get_regressions(
+            results, load_results(cmd_args.baseline), cmd_args.max_regression
+        )
+        for regression in regressions:
+            logger.error(f"Performance regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+def get_cmd_args():
+    parser = ArgumentParser(description="Headless game session benchmark")
+    parser.add_argument(
+        "--blocks_numbers",
+        dest="blocks_numbers",
+        type=int,
+        nargs="+",
+        default=[3, 6, 12],
+        help="Board sizes in blocks",
+    )
+    parser.add_argument(
+        "--guards_numbers",
+        dest="guards_numbers",
+        type=int,
+        nargs="+",
+        default=[4, 16],
+    )
+    parser.add_argument(
+        "--players_numbers",
+        dest="players_numbers",
+        type=int,
+        nargs="+",
+        default=[1, 8],
+    )
+    parser.add_argument(
+        "-t",
+        "--ticks_number",
+        dest="ticks_number",
+        type=int,
+        default=DEFAULT_BENCHMARK_TICKS,
+    )
+    parser.add_argument(
+        "--player_kind",
+        dest="player_kind",
+        choices=PLAYER_KINDS,
+        default=BOT_PLAYER,
+        help="Bots walk to the nearest gold, scripted players act randomly",
+    )
+    parser.add_argument(
+        "--format",
+        dest="broadcast_format",
+        choices=BROADCAST_FORMATS,
+        default=JSON_FORMAT,
+    )
+    parser.add_argument("--seed", dest="random_seed", type=int, default=0)
+    parser.add_argument(
+        "-o", "--output", dest="output", help="Save results to JSON file"
+    )
+    parser.add_argument(
+        "--baseline",
+        dest="baseline",
+        help="JSON results to compare with, exits with 1 on regression",
+    )
+    parser.add_argument(
+        "--max_regression",
+        dest="max_regression",
+        type=float,
+        default=DEFAULT_MAX_REGRESSION,
+        help="Allowed drop of ticks per second relative to baseline",
+    )
+    parser.add_argument(
+        "-l",
+        "--log_level",
+        dest="log_level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="WARNING",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import asyncio
+from argparse import ArgumentParser
+from logging import getLogger
+from multiprocessing import Process, resource_tracker
+
+from client.bot_farm import BotFarm
+from common.shared_navigation import SharedJointsMasks
+from common.utils import PLAYER, GUARD, BROADCAST_FORMATS, DELTA_FORMAT, DEFAULT_ROOM
+from utils.configure_logging import setup_logging
+
+logger = getLogger()
+
+
+def main():
+    cmd_args = get_cmd_args()
+    setup_logging(cmd_args.log_level)
+    if cmd_args.processes_number <= 1:
+        run_farm(cmd_args, range(cmd_args.bots_number))
+        return
+
+    # One resource tracker for all processes, shared segments outlive single bots
+    resource_tracker.ensure_running()
+    processes = [
+        Process(
+            target=run_farm,
+            args=(
+                cmd_args,
+                range(idx, cmd_args.bots_number, cmd_args.processes_number),
+            ),
+            daemon=True,
+        )
+        for idx in range(cmd_args.processes_number)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {len(processes)} bot farm processes")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        logger.info("Exiting from bot farm")
+
+
+def run_farm(cmd_args, bots_indexes):
+    setup_logging(cmd_args.log_level)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    farm = BotFarm(
+        loop,
+        cmd_args.host,
+        cmd_args.port,
+        broadcast_format=cmd_args.broadcast_format,
+        room=cmd_args.room,
+        shared_joints=SharedJointsMasks(),
+        navigation_url=(
+            f"http://{cmd_args.host}:{cmd_args.web_port}/nav"
+            if cmd_args.web_port
+            else None
+        ),
+    )
+    for idx in bots_indexes:
+        farm.add_bot(cmd_args.client_type, f"{cmd_args.name_prefix}-{idx}")
+    logger.info(f"Started {len(farm.factories)} bots")
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        farm.close()
+
+
+def get_cmd_args():
+    parser = ArgumentParser(description="Many bots sharing navigation tables")
+    parser.add_argument("--host", dest="host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", dest="port", type=int, default=9000)
+    parser.add_argument(
+        "--web_port",
+        dest="web_port",
+        type=int,
+        default=8080,
+        help="Web server port serving navigation data, 0 builds it from frames",
+    )
+    parser.add_argument("-n", "--bots", dest="bots_number", type=int, default=20)
+    parser.add_argument(
+        "--processes",
+        dest="processes_number",
+        type=int,
+        default=1,
+        help="Processes to spread the bots over",
+    )
+    parser.add_argument(
+        "--client_type", dest="client_type", choices=[PLAYER, GUARD], default=PLAYER
+    )
+    parser.add_argument("--name_prefix", dest="name_prefix", default="bot")
+    parser.add_argument(
+        "--format",
+        dest="broadcast_format",
+        choices=BROADCAST_FORMATS,
+        default=DELTA_FORMAT,
+    )
+    parser.add_argument("--room", dest="room", default=DEFAULT_ROOM)
+    parser.add_argument(
+        "-l",
+        "--log_level",
+        dest="log_level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+# Frames are compared by chunks, only differing chunks are scanned cell by cell
+COMPARE_CHUNK_SIZE = 64
+
+
+class BoardMirror:
+    # Client copy of the board, updated only in changed cells. Target cells are
+    # tracked on the way, so frames don't need a scan of the whole board
+    def __init__(self, size: int, target_cell_types: Iterable[str]):
+        self.size = size
+        self.cells = bytearray(size * size)
+        self._target_codes = frozenset(
+            ord(cell_type) for cell_type in target_cell_types
+        )
+        self.target_indexes: Set[int] = set()
+        self._frozen_target_indexes: Optional[FrozenSet[int]] = None
+
+    def apply_board(self, board_bytes: bytes) -> List[int]:
+        changed_indexes = get_changed_indexes(self.cells, board_bytes)
+        for index in changed_indexes:
+            self._set_cell_code(index, board_bytes[index])
+        return changed_indexes
+
+    def apply_diff(self, board_diff: Dict[str, str]) -> List[int]:
+        changed_indexes = []
+        for cell_index, cell_type in board_diff.items():
+            index = int(cell_index)
+            changed_indexes.append(index)
+            self._set_cell_code(index, ord(cell_type))
+        return changed_indexes
+
+    def _set_cell_code(self, index: int, cell_code: int):
+        self.cells[index] = cell_code
+        is_target = cell_code in self._target_codes
+        if is_target != (index in self.target_indexes):
+            self._frozen_target_indexes = None
+            if is_target:
+                self.target_indexes.add(index)
+            else:
+                self.target_indexes.remove(index)
+
+    def get_cell(self, index: int) -> Tuple[int, int]:
+        y_coord, x_coord = divmod(index, self.size)
+        return x_coord, y_coord
+
+    def get_cell_type(self, index: int) -> str:
+        return chr(self.cells[index])
+
+    def get_target_indexes(self) -> FrozenSet[int]:
+        # Same object until targets change, so it can key cached distance fields
+        if self._frozen_target_indexes is None:
+            self._frozen_target_indexes = frozenset(self.target_indexes)
+        return self._frozen_target_indexes
+
+    def get_board_bytes(self) -> bytes:
+        return bytes(self.cells)
+
+
+def get_changed_indexes(old_bytes: bytearray, new_bytes: bytes) -> List[int]:
+    changed_indexes = []
+    for chunk_start in range(0, len(new_bytes), COMPARE_CHUNK_SIZE):
+        chunk_end = chunk_start + COMPARE_CHUNK_SIZE
+        if old_bytes[chunk_start:chunk_end] == new_bytes[chunk_start:chunk_end]:
+            continue
+        for index in range(chunk_start, min(chunk_end, len(new_bytes))):
+            if old_bytes[index] != new_bytes[index]:
+                changed_indexes.append(index)
+    return changed_indexes
+
+
+def get_board_bytes(board_layers: List[List[str]]) -> bytes:
+    return "".join(map("".join, board_layers)).encode()
@@ -0,0 +1,89 @@
+import asyncio
+from logging import getLogger
+from typing import Dict, List, Optional
+
+from autobahn.asyncio.websocket import WebSocketClientProtocol
+
+from client.game_client import GameClientFactory, LodeRunnerClientProtocol
+from common.shared_navigation import SharedJointsMasks
+from common.utils import DELTA_FORMAT, DEFAULT_ROOM
+
+logger = getLogger()
+
+RECONNECT_DELAY = 1
+
+
+class FarmClientProtocol(LodeRunnerClientProtocol):
+    # Closed connections are reconnected by the farm, the loop keeps serving others
+    def onClose(self, wasClean, code, reason):
+        logger.info(f"WebSocket connection of '{self.name}' closed: {reason}")
+
+    def connection_lost(self, exc):
+        WebSocketClientProtocol.connection_lost(self, exc)
+        self.factory.client = None
+        self.factory.farm.reconnect(self.factory)
+
+
+class BotFarm:
+    # Many bots in one event loop, navigation of a board is built once per process
+    # and its joints once per host
+    def __init__(
+        self,
+        loop,
+        host: str,
+        port: int,
+        broadcast_format: str = DELTA_FORMAT,
+        room: str = DEFAULT_ROOM,
+        shared_joints: Optional[SharedJointsMasks] = None,
+        navigation_url: Optional[str] = None,
+    ):
+        self.loop = loop
+        self.host = host
+        self.port = port
+        self.broadcast_format = broadcast_format
+        self.room = room
+        self.shared_joints = shared_joints
+        self.navigation_url = navigation_url
+        self.factories: List[GameClientFactory] = []
+        self._navigations: Dict = {}
+        self._navigation_requests: Dict = {}
+        self._is_closed = False
+
+    def add_bot(self, client_type: str, name: str):
+        factory = GameClientFactory(
+            url=f"ws://{self.host}:{self.port}",
+            client_type=client_type,
+            name=name,
+            broadcast_format=self.broadcast_format,
+            room=self.room,
+        )
+        factory.protocol = FarmClientProtocol
+        factory.navigations = self._navigations
+        factory.shared_joints = self.shared_joints
+        factory.navigation_url = self.navigation_url
+        factory.navigation_requests = self._navigation_requests
+        factory.farm = self
+        self.factories.append(factory)
+        self.loop.create_task(self.connect(factory))
+
+    async def connect(self, factory: GameClientFactory, delay: float = 0):
+        await asyncio.sleep(delay)
+        while not self._is_closed:
+            try:
+                await self.loop.create_connection(factory, self.host, self.port)
+                return
+            except OSError as err:
+                logger.debug(f"Couldn't connect '{factory.name}': {err}")
+                await asyncio.sleep(RECONNECT_DELAY)
+
+    def reconnect(self, factory: GameClientFactory):
+        if not self._is_closed:
+            self.loop.create_task(self.connect(factory, RECONNECT_DELAY))
+
+    def close(self):
+        self._is_closed = True
+        for factory in self.factories:
+            if factory.client is not None:
+                factory.client.sendClose()
+        if self.shared_joints is not None:
+            self.shared_joints.close()
@@ -5,38 +5,74 @@ from autobahn.asyncio import WebSocketClientFactory
 from autobahn.asyncio.websocket import WebSocketClientProtocol
 from logging import getLogger
 from random import choice
-from typing import Dict
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
+from client.board_mirror import BoardMirror, get_board_bytes
+from common.board_frame import decode_board_frame, get_board_layers_from_bytes
+from common.navigation import (
+    DistanceFields,
+    NavigationBoard,
+    get_joints_info_from_masks,
+    get_joints_masks,
+)
+from common.navigation_cache import decode_navigation_data, get_board_hash
+from common.shared_navigation import SharedJointsMasks
 from common.utils import (
     PLAYER,
     GUARD,
+    DELTA_FORMAT,
+    DEFAULT_ROOM,
     CellType,
+    ClientCommand,
     get_board_info,
     Move,
     CellGroups,
     CELL_TYPE_COERCION,
-    get_global_wave_age_info,
     get_joints_info,
-    get_next_target_age,
 )
 
 logger = getLogger()
 
 
 class GameClientFactory(WebSocketClientFactory):
-    def __init__(self, url, client_type, name):
+    def __init__(
+        self, url, client_type, name, broadcast_format=DELTA_FORMAT, room=DEFAULT_ROOM
+    ):
         self.name = name
         self.client_type = client_type
-        super().__init__(f"{url}?client_type={client_type}&name={name}")
+        self.room = room
+        super().__init__(
+            f"{url}?client_type={client_type}&name={name}&format={broadcast_format}"
+            f"&room={room}"
+        )
         self.protocol = LodeRunnerClientProtocol
         self.client = None
+        # Navigation of boards shared by clients of the factory, None disables sharing
+        self.navigations: Optional[Dict[bytes, "BotNavigation"]] = None
+        # Joints masks shared by bot processes of the host, None disables sharing
+        self.shared_joints: Optional[SharedJointsMasks] = None
+        # URL of navigation data served by the web server, None builds it from frames
+        self.navigation_url: Optional[str] = None
+        self.navigation_requests: Dict[str, asyncio.Future] = {}
+
+    def get_navigation_request(self, board_hash: str) -> asyncio.Future:
+        request = self.navigation_requests.get(board_hash)
+        if request is None:
+            request = self.navigation_requests[board_hash] = asyncio.ensure_future(
+                fetch_navigation_data(
+                    f"{self.navigation_url}/{board_hash}?room={self.room}"
+                )
+            )
+        return request
 
 
 class LodeRunnerClientProtocol(WebSocketClientProtocol):
     target_cell_types = None
-    board_info = None
-    joints_info = None
-    path_finder_cls = None
+    board_mirror = None
+    navigation = None
+    path_finder = None
+    moved_tick = None
+    board_hash = None
 
     @property
     def name(self):
@@ -57,25 +93,81 @@ class LodeRunnerClientProtocol(WebSocketClientProtocol):
             raise Exception
 
     def onMessage(self, payload, isBinary):
-        if not isBinary:
-            message = json.loads(payload.decode())
+        frame = self.get_frame(payload, isBinary)
+        if frame is not None:
+            self.on_frame(*frame)
 
-            board_layers = message["board"]
+    def get_frame(self, payload, isBinary) -> Optional[Tuple[int, List, List[int]]]:
+        # Applies the frame to the board mirror, returns tick, hero and changed cells
+        if isBinary:
+            size, tick, hero_info, board_bytes = decode_board_frame(payload)
+            return tick, hero_info, self.get_board_mirror(size).apply_board(board_bytes)
 
-            self.board_info = self.board_info or get_board_info(
-                get_coerced_board_layers(board_layers)
+        message = json.loads(payload.decode())
+        board_hash = message.get("board_hash", self.board_hash)
+        if board_hash != self.board_hash:
+            self.board_hash = board_hash
+            self.navigation = None
+        if "board" in message:
+            board_bytes = get_board_bytes(message["board"])
+            changed_indexes = self.get_board_mirror(message["size"]).apply_board(
+                board_bytes
             )
+        elif "diff" in message:
+            if self.board_mirror is None or self.board_mirror.size != message["size"]:
+                self.sendMessage(ClientCommand.Resync.encode())
+                return None
+            changed_indexes = self.board_mirror.apply_diff(message["diff"])
+        else:
+            return None
+        return message["tick"], message["hero"], changed_indexes
 
-            self.joints_info = self.joints_info or get_joints_info(self.board_info)
+    def get_board_mirror(self, size: int) -> BoardMirror:
+        if self.board_mirror is None or self.board_mirror.size != size:
+            self.board_mirror = BoardMirror(size, self.target_cell_types or [])
+            self.navigation = None
+        return self.board_mirror
 
-            self.path_finder_cls = self.path_finder_cls or path_finder_factory(
-                self.joints_info, self.target_cell_types, self.board_info
-            )
+    def on_frame(self, tick, hero_info, changed_indexes) -> Optional[str]:
+        if self.navigation is None:
+            if not self.init_navigation():
+                return None
+        else:
+            self.navigation.update_pit_cells(self.board_mirror, changed_indexes)
 
-            path_finder = self.path_finder_cls(board_layers)
-            action = path_finder.get_routed_move_action()
-            self.sendMessage(bytes(action.encode()))
-            logger.debug(f"'{self.name}' has sent message: '{action}'")
+        # Actions are applied once per tick, later frames of the tick get no answer
+        if tick == self.moved_tick:
+            return None
+        self.moved_tick = tick
+        my_cell = (hero_info[0], hero_info[1]) if hero_info else None
+        action = self.path_finder.get_routed_move_action(
+            my_cell, self.board_mirror.get_target_indexes()
+        )
+        self.sendMessage(bytes(action.encode()))
+        logger.debug(f"'{self.name}' has sent message: '{action}'")
+        return action
+
+    def init_navigation(self) -> bool:
+        # Waits for served navigation data of the board, if it's unavailable
+        # the navigation is built from the board mirror
+        served_navigation = None
+        if self.factory.navigation_url and self.board_hash:
+            request = self.factory.get_navigation_request(self.board_hash)
+            if not request.done():
+                return False
+            served_navigation = request.result()
+            if served_navigation and served_navigation[0] != self.board_mirror.size:
+                served_navigation = None
+        self.navigation = get_bot_navigation(
+            self.board_mirror,
+            self.factory.navigations,
+            self.factory.shared_joints,
+            served_navigation,
+        )
+        self.path_finder = ClientPathFinder(
+            self.navigation.joints_info, self.navigation.distance_fields
+        )
+        return True
 
     def onClose(self, wasClean, code, reason):
         logger.info(f"WebSocket connection of '{self.name}' closed: {reason}")
@@ -86,6 +178,98 @@ class LodeRunnerClientProtocol(WebSocketClientProtocol):
         asyncio.get_event_loop().stop()
 
 
+class BotNavigation:
+    def __init__(
+        self,
+        board_bytes: bytes,
+        board_mirror: BoardMirror,
+        joints_info: Optional[Dict[Tuple[int, int], List]] = None,
+    ):
+        size = board_mirror.size
+        if joints_info is None:
+            joints_info = get_joints_info(
+                get_board_info(get_board_layers_from_bytes(board_bytes, size))
+            )
+        self.joints_info = joints_info
+        self.distance_fields = DistanceFields(self.joints_info, size)
+        self.navigation_board = NavigationBoard(
+            board_bytes, size, self.joints_info, self.distance_fields
+        )
+        pit_code = ord(CellType.DrillableBrick)
+        self.pit_indexes = {
+            index for index, cell_code in enumerate(board_bytes) if cell_code == pit_code
+        }
+        self.update_pit_cells(board_mirror, self.pit_indexes)
+
+    def update_pit_cells(self, board_mirror: BoardMirror, changed_indexes):
+        for index in self.pit_indexes.intersection(changed_indexes):
+            self.navigation_board.update_pit_cell(
+                board_mirror.get_cell(index), board_mirror.get_cell_type(index)
+            )
+
+
+def get_bot_navigation(
+    board_mirror: BoardMirror,
+    navigations: Optional[Dict[bytes, BotNavigation]] = None,
+    shared_joints: Optional[SharedJointsMasks] = None,
+    served_navigation: Optional[Tuple[int, bytes, bytes]] = None,
+) -> BotNavigation:
+    # Bots of one process seeing the same board share its navigation tables
+    size = board_mirror.size
+    if served_navigation is not None:
+        _, board_bytes, joints_masks = served_navigation
+    else:
+        board_bytes = get_board_bytes(
+            get_coerced_board_layers(
+                get_board_layers_from_bytes(board_mirror.get_board_bytes(), size)
+            )
+        )
+    navigation = navigations.get(board_bytes) if navigations is not None else None
+    if navigation is not None:
+        navigation.update_pit_cells(board_mirror, navigation.pit_indexes)
+        return navigation
+
+    joints_info = None
+    if served_navigation is not None:
+        joints_info = get_joints_info_from_masks(joints_masks, size)
+    elif shared_joints is not None:
+        joints_info = get_shared_joints_info(board_bytes, size, shared_joints)
+    navigation = BotNavigation(board_bytes, board_mirror, joints_info)
+    if navigations is not None:
+        navigations[board_bytes] = navigation
+    return navigation
+
+
+def get_shared_joints_info(
+    board_bytes: bytes, size: int, shared_joints: SharedJointsMasks
+) -> Dict[Tuple[int, int], List]:
+    # Joints are computed by the first process seeing the board, others map them
+    board_layers = list(map("".join, get_board_layers_from_bytes(board_bytes, size)))
+    board_hash = get_board_hash(board_layers)
+    joints_masks = shared_joints.load_joints_masks(board_hash, size)
+    if joints_masks is not None:
+        return get_joints_info_from_masks(joints_masks, size)
+    joints_info = get_joints_info(get_board_info(board_layers))
+    shared_joints.save_joints_masks(board_hash, get_joints_masks(joints_info, size))
+    return joints_info
+
+
+async def fetch_navigation_data(url: str) -> Optional[Tuple[int, bytes, bytes]]:
+    # Imported here, only bots using served navigation data need it
+    from aiohttp import ClientError, ClientSession
+
+    try:
+        async with ClientSession() as session:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    logger.warning(f"Navigation data isn't served by '{url}'")
+                    return None
+                return decode_navigation_data(await response.read())
+    except (ClientError, OSError, ValueError) as err:
+        logger.warning(f"Couldn't fetch navigation data from '{url}': {err}")
+        return None
+
+
 def get_coerced_board_layers(board_layers):
     coerced = []
     for board_layer in board_layers:
@@ -95,43 +279,26 @@ def get_coerced_board_layers(board_layers):
     return coerced
 
 
-def path_finder_factory(joints_info, target_cell_types, board_info: Dict):
-    global_wave_age_info = get_global_wave_age_info(joints_info, board_info)
-
-    class ClientPathFinder:
-        def __init__(self, board_layers):
-            self.my_cell, self.target_cells = self.get_my_cell_and_target_cells(
-                board_layers
-            )
-
-        @staticmethod
-        def get_my_cell_and_target_cells(board_layers):
-            target_cells = []
-            my_cell = None
-            for yid, layer in enumerate(board_layers):
-                for xid, cell_code in enumerate(layer):
-                    if not my_cell and cell_code in CellGroups.HeroCellTypes:
-                        my_cell = (xid, yid)
-                    elif cell_code in target_cell_types:
-                        target_cells.append((xid, yid))
-            return my_cell, target_cells
-
-        def get_routed_move_action(self):
-            if self.target_cells:
-                next_cell, _, _ = get_next_target_age(
-                    global_wave_age_info, joints_info, self.target_cells, self.my_cell
-                )
+class ClientPathFinder:
+    def __init__(self, joints_info, distance_fields):
+        self.joints_info = joints_info
+        self.distance_fields = distance_fields
 
-                if next_cell:
-                    return get_move_action(self.my_cell, next_cell)
-                elif joints_info[self.my_cell]:
-                    return get_move_action(
-                        self.my_cell, choice(joints_info[self.my_cell])
-                    )
+    def get_routed_move_action(self, my_cell, target_indexes: FrozenSet[int]):
+        if my_cell and target_indexes:
+            my_index = self.distance_fields.get_cell_index(my_cell)
+            if my_index in target_indexes:
+                target_indexes = target_indexes - {my_index}
+        if my_cell and target_indexes:
+            field = self.distance_fields.get_targets_field(target_indexes)
+            next_cell = self.distance_fields.get_field_next_cell(field, my_cell)
 
-            return choice(Move.get_valid_codes())
+            if next_cell:
+                return get_move_action(my_cell, next_cell)
+            elif self.joints_info[my_cell]:
+                return get_move_action(my_cell, choice(self.joints_info[my_cell]))
 
-    return ClientPathFinder
+        return choice(Move.get_valid_codes())
 
 
 def get_move_action(start_cell, end_cell):
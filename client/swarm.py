@@ -0,0 +1,189 @@
+import asyncio
+from collections import Counter
+from logging import getLogger
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+from autobahn.asyncio.websocket import WebSocketClientProtocol
+
+from client.game_client import GameClientFactory, LodeRunnerClientProtocol
+from common.utils import (
+    PLAYER,
+    SPECTATOR,
+    DELTA_FORMAT,
+    DEFAULT_ROOM,
+    Move,
+    get_left_cell,
+    get_lower_cell,
+    get_milliseconds,
+    get_right_cell,
+    get_upper_cell,
+)
+
+logger = getLogger()
+
+PERCENTILES = (50, 90, 99)
+# Ticks after the action tick by which the hero should have moved
+MAX_ACTION_TICKS = 2
+MOVE_CELL_GETTERS = {
+    Move.Left: get_left_cell,
+    Move.Right: get_right_cell,
+    Move.Up: get_upper_cell,
+    Move.Down: get_lower_cell,
+}
+
+
+class SwarmStats:
+    def __init__(self, tick_time: float):
+        self.tick_time = tick_time
+        self.frame_intervals: List[float] = []
+        self.round_trips: List[float] = []
+        self.frames_number = 0
+        self.dropped_frames_number = 0
+        self.unconfirmed_actions_number = 0
+        self.clients_counter = Counter()
+        # Earliest arrival of every tick over all clients
+        self._ticks_arrivals: Dict[int, float] = {}
+
+    def add_frame(
+        self,
+        client: "SwarmClientProtocol",
+        tick: int,
+        hero_info: Optional[List],
+        arrival_time: float,
+    ):
+        self.frames_number += 1
+        if tick not in self._ticks_arrivals:
+            self._ticks_arrivals[tick] = arrival_time
+        if client.last_tick is not None:
+            self.frame_intervals.append(arrival_time - client.last_frame_time)
+            if tick > client.last_tick + 1:
+                self.dropped_frames_number += tick - client.last_tick - 1
+        if client.action_tick is not None and tick > client.action_tick:
+            # Round trip ends with the first frame showing the hero moved as asked,
+            # moves the server rejected or didn't show in time aren't measured
+            hero_cell = (hero_info[0], hero_info[1]) if hero_info else None
+            if hero_cell == client.action_cell:
+                self.round_trips.append(arrival_time - client.action_time)
+                client.action_tick = None
+            elif tick > client.action_tick + MAX_ACTION_TICKS:
+                self.unconfirmed_actions_number += 1
+                client.action_tick = None
+
+    def get_ticks_lags(self) -> List[float]:
+        # Ticks are due every tick time after the one which came the earliest
+        offsets = [
+            arrival_time - tick * self.tick_time
+            for tick, arrival_time in self._ticks_arrivals.items()
+        ]
+        if not offsets:
+            return []
+        min_offset = min(offsets)
+        return [offset - min_offset for offset in offsets]
+
+    def get_report(self) -> Dict[str, Dict]:
+        return {
+            "clients": dict(self.clients_counter),
+            "frames": {
+                "received": self.frames_number,
+                "dropped": self.dropped_frames_number,
+            },
+            "unconfirmed_actions": self.unconfirmed_actions_number,
+            "frame_interval": get_percentiles(self.frame_intervals),
+            "action_round_trip": get_percentiles(self.round_trips),
+            "tick_lag": get_percentiles(self.get_ticks_lags()),
+        }
+
+
+class SwarmClientProtocol(LodeRunnerClientProtocol):
+    last_tick: Optional[int] = None
+    last_frame_time: Optional[float] = None
+    action_tick: Optional[int] = None
+    action_time: Optional[float] = None
+    action_cell: Optional[Tuple[int, int]] = None
+
+    def onConnect(self, response):
+        if self.client_type == SPECTATOR:
+            self.factory.client = self
+        else:
+            super().onConnect(response)
+        self.factory.stats.clients_counter["connected"] += 1
+
+    def on_frame(self, tick, hero_info, changed_indexes):
+        arrival_time = monotonic()
+        self.factory.stats.add_frame(self, tick, hero_info, arrival_time)
+        self.last_tick, self.last_frame_time = tick, arrival_time
+        if self.client_type != PLAYER:
+            return None
+        action = super().on_frame(tick, hero_info, changed_indexes)
+        if action is not None and hero_info and self.action_tick is None:
+            self.action_tick, self.action_time = tick, monotonic()
+            self.action_cell = MOVE_CELL_GETTERS[action]((hero_info[0], hero_info[1]))
+        return action
+
+    def onClose(self, wasClean, code, reason):
+        logger.debug(f"WebSocket connection of '{self.name}' closed: {reason}")
+        self.factory.stats.clients_counter["closed"] += 1
+
+    def connection_lost(self, exc):
+        WebSocketClientProtocol.connection_lost(self, exc)
+
+
+class Swarm:
+    def __init__(
+        self,
+        loop,
+        host: str,
+        port: int,
+        stats: SwarmStats,
+        broadcast_format: str = DELTA_FORMAT,
+        room: str = DEFAULT_ROOM,
+    ):
+        self.loop = loop
+        self.host = host
+        self.port = port
+        self.stats = stats
+        self.broadcast_format = broadcast_format
+        self.room = room
+        self.factories: List[GameClientFactory] = []
+        # Navigation tables shared by all bots of the swarm
+        self._navigations = {}
+
+    async def connect(self, client_type: str, clients_number: int, connect_rate: float):
+        for idx in range(clients_number):
+            factory = GameClientFactory(
+                url=f"ws://{self.host}:{self.port}",
+                client_type=client_type,
+                name=f"swarm-{client_type}-{idx}",
+                broadcast_format=self.broadcast_format,
+                room=self.room,
+            )
+            factory.protocol = SwarmClientProtocol
+            factory.navigations = self._navigations
+            factory.stats = self.stats
+            self.factories.append(factory)
+            try:
+                await self.loop.create_connection(factory, self.host, self.port)
+            except OSError as err:
+                logger.warning(f"Couldn't connect {client_type} #{idx}: {err}")
+                self.stats.clients_counter["failed"] += 1
+            await asyncio.sleep(1 / connect_rate)
+
+    def close(self):
+        for factory in self.factories:
+            if factory.client is not None:
+                factory.client.sendClose()
+
+
+def get_percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    sorted_values = sorted(values)
+    percentiles = {
+        f"p{percentile}": get_milliseconds(
+            sorted_values[min(len(values) - 1, len(values) * percentile // 100)]
+        )
+        for percentile in PERCENTILES
+    }
+    percentiles["max"] = get_milliseconds(sorted_values[-1])
+    return percentiles
@@ -3,7 +3,7 @@ import sys
 from logging import getLogger
 
 from client.game_client import GameClientFactory
-from common.utils import PLAYER
+from common.utils import PLAYER, DELTA_FORMAT, DEFAULT_ROOM
 from utils.configure_logging import setup_logging
 
 logger = getLogger()
@@ -21,7 +21,11 @@ def main():
 
 def run_loop(loop):
     factory = GameClientFactory(
-        url=f"ws://127.0.0.1:9000", client_type=PLAYER, name=sys.argv[1]
+        url=f"ws://127.0.0.1:9000",
+        client_type=PLAYER,
+        name=sys.argv[1],
+        broadcast_format=sys.argv[2] if len(sys.argv) > 2 else DELTA_FORMAT,
+        room=sys.argv[3] if len(sys.argv) > 3 else DEFAULT_ROOM,
     )
 
     while True:
@@ -0,0 +1,87 @@
+import struct
+from itertools import groupby
+from typing import Dict, List, Optional, Tuple
+
+# flags, board size, tick number, hero x, hero y, hero cell code
+BOARD_FRAME_HEADER = struct.Struct("!BHIHHB")
+RLE_FLAG = 0x01
+NO_HERO_CODE = 0
+MAX_RUN_LENGTH = 255
+
+
+class BoardFrameEncoder:
+    # RLE is opt-in, on real boards runs are short and encoded bodies only grow
+    def __init__(self, use_rle: bool = False):
+        self._use_rle = use_rle
+        self._body = b""
+        self._flags = 0
+        self._size = 0
+        self._tick = 0
+        # Frames of the tick by hero, clients without a hero share one frame
+        self._frames: Dict[Tuple[int, int, int], bytes] = {}
+        self.owner = None
+
+    def set_board(self, owner, size: int, tick: int, board_bytes: bytes):
+        self._body, self._flags = board_bytes, 0
+        if self._use_rle:
+            rle_body = get_rle_encoded(board_bytes)
+            if len(rle_body) < len(board_bytes):
+                self._body, self._flags = rle_body, RLE_FLAG
+        self._size = size
+        self._tick = tick
+        self._frames.clear()
+        self.owner = owner
+
+    def get_frame(self, hero_info: Optional[List] = None) -> bytes:
+        hero_x, hero_y, hero_code = 0, 0, NO_HERO_CODE
+        if hero_info:
+            hero_x, hero_y, hero_code = hero_info[0], hero_info[1], ord(hero_info[2])
+        hero_key = (hero_x, hero_y, hero_code)
+        frame = self._frames.get(hero_key)
+        if frame is None:
+            frame = (
+                BOARD_FRAME_HEADER.pack(
+                    self._flags, self._size, self._tick, hero_x, hero_y, hero_code
+                )
+                + self._body
+            )
+            self._frames[hero_key] = frame
+        return frame
+
+
+def decode_board_frame(frame: bytes) -> Tuple[int, int, Optional[List], bytes]:
+    header = BOARD_FRAME_HEADER.unpack_from(frame)
+    flags, size, tick, hero_x, hero_y, hero_code = header
+    body = bytes(frame[BOARD_FRAME_HEADER.size :])
+    if flags & RLE_FLAG:
+        body = get_rle_decoded(body)
+    hero_info = None
+    if hero_code != NO_HERO_CODE:
+        hero_info = [hero_x, hero_y, chr(hero_code)]
+    return size, tick, hero_info, body
+
+
+def get_rle_encoded(data: bytes) -> bytes:
+    encoded = bytearray()
+    for cell_code, group in groupby(data):
+        run_length = sum(1 for _ in group)
+        while run_length > 0:
+            chunk_length = min(run_length, MAX_RUN_LENGTH)
+            encoded += bytes((chunk_length, cell_code))
+            run_length -= chunk_length
+    return bytes(encoded)
+
+
+def get_rle_decoded(data: bytes) -> bytes:
+    return b"".join(
+        bytes((cell_code,)) * run_length
+        for run_length, cell_code in zip(data[::2], data[1::2])
+    )
+
+
+def get_board_layers_from_bytes(board_bytes: bytes, size: int) -> List[List[str]]:
+    board_text = board_bytes.decode()
+    return [
+        list(board_text[offset : offset + size])
+        for offset in range(0, len(board_text), size)
+    ]
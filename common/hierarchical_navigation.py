@@ -0,0 +1,369 @@
+from array import array
+from collections import OrderedDict
+from heapq import heappop, heappush
+from typing import Dict, List, Optional, Tuple
+
+from common.navigation import (
+    DEFAULT_DISTANCE_FIELDS_MEMORY_LIMIT,
+    UNREACHABLE,
+    get_distance_field,
+)
+
+EXIT = 0
+ENTRY = 1
+# Tables of pit signatures no block has now, kept for pits opened again
+MAX_UNUSED_BLOCK_TABLES_NUMBER = 64
+
+
+class BlockTable:
+    def __init__(self, local_joints: List[List[int]], signature: Tuple):
+        self.joints = local_joints
+        self.signature = signature
+        self.references_number = 0
+        local_reverse_joints: List[List[int]] = [[] for _ in local_joints]
+        for local_index, cell_joints in enumerate(local_joints):
+            for joint_index in cell_joints:
+                local_reverse_joints[joint_index].append(local_index)
+        # distances[target][start] is the shortest path staying inside the block
+        self.distances = [
+            get_distance_field(local_reverse_joints, target_index)
+            for target_index in range(len(local_joints))
+        ]
+
+    def get_next_local_index(self, start_index: int, target_index: int) -> int:
+        target_distances = self.distances[target_index]
+        distance = target_distances[start_index]
+        for joint_index in self.joints[start_index]:
+            if target_distances[joint_index] == distance - 1:
+                return joint_index
+
+
+class NavigationBlock:
+    def __init__(self, table: BlockTable, cells: List[int]):
+        self.table = table
+        self.cells = cells
+        # (local index, slot) of cells with joints leading out of / into the block
+        self.exits: List[Tuple[int, int]] = []
+        self.entries: List[Tuple[int, int]] = []
+
+
+class HierarchicalField:
+    def __init__(
+        self,
+        navigator: "HierarchicalNavigator",
+        target_index: int,
+        exit_distances: array,
+        entry_distances: array,
+    ):
+        self._navigator = navigator
+        self._target_index = target_index
+        self._exit_distances = exit_distances
+        self._entry_distances = entry_distances
+
+    def __getitem__(self, cell_index: int) -> int:
+        return self._get_best_route(cell_index)[0]
+
+    def get_next_index(self, cell_index: int) -> Optional[int]:
+        distance, exit_local_index, exit_slot = self._get_best_route(cell_index)
+        if distance in (0, UNREACHABLE):
+            return None
+        navigator = self._navigator
+        block = navigator.get_cell_block(cell_index)
+        local_index = navigator.get_local_index(cell_index)
+        if exit_slot is None:
+            target_local_index = navigator.get_local_index(self._target_index)
+            return block.cells[
+                block.table.get_next_local_index(local_index, target_local_index)
+            ]
+        if local_index != exit_local_index:
+            return block.cells[
+                block.table.get_next_local_index(local_index, exit_local_index)
+            ]
+        for entry_index, entry_slot in navigator.exit_joints[exit_slot]:
+            if self._entry_distances[entry_slot] + 1 == distance:
+                return entry_index
+
+    def _get_best_route(self, cell_index: int) -> Tuple[int, int, int]:
+        navigator = self._navigator
+        block = navigator.get_cell_block(cell_index)
+        local_index = navigator.get_local_index(cell_index)
+        best_route = (UNREACHABLE, None, None)
+        if navigator.get_cell_block(self._target_index) is block:
+            target_local_index = navigator.get_local_index(self._target_index)
+            distance = block.table.distances[target_local_index][local_index]
+            best_route = (distance, None, None)
+        for exit_local_index, exit_slot in block.exits:
+            exit_distance = self._exit_distances[exit_slot]
+            to_exit_distance = block.table.distances[exit_local_index][local_index]
+            if exit_distance == UNREACHABLE or to_exit_distance == UNREACHABLE:
+                continue
+            if to_exit_distance + exit_distance < best_route[0]:
+                best_route = (
+                    to_exit_distance + exit_distance,
+                    exit_local_index,
+                    exit_slot,
+                )
+        return best_route
+
+
+class HierarchicalNavigator:
+    def __init__(
+        self,
+        joints_info: Dict[Tuple[int, int], List],
+        size: int,
+        block_size: int,
+        memory_limit: int = DEFAULT_DISTANCE_FIELDS_MEMORY_LIMIT,
+    ):
+        self.size = size
+        self.block_size = block_size
+        self._blocks_number = size // block_size
+        self._joints: List[List[int]] = [[] for _ in range(size * size)]
+        for cell, cell_joints in joints_info.items():
+            self._joints[self.get_cell_index(cell)] = [
+                self.get_cell_index(joint_cell) for joint_cell in cell_joints
+            ]
+        self._block_tables: Dict[Tuple, BlockTable] = {}
+        self._unused_block_tables: OrderedDict = OrderedDict()
+        self._blocks: List[NavigationBlock] = []
+        self._cell_blocks = array("I", [0]) * (size * size)
+        self._cell_local_indexes = array("H", [0]) * (size * size)
+        # Abstract graph: exits of a block are joined to entries of other blocks.
+        # Each cell on a block edge has one exit and one entry slot, cells without
+        # joints across the edge are left out of exits and entries of its block
+        self._portal_slots: Dict[int, int] = {}
+        self.exit_joints: List[List[Tuple[int, int]]] = []
+        self._exit_blocks: List[int] = []
+        self._exit_local_indexes: List[int] = []
+        self._entry_exits: List[List[int]] = []
+        self._build_blocks()
+        self._build_portals()
+        self._fields: OrderedDict = OrderedDict()
+        field_size = max(1, 2 * len(self._portal_slots)) * array("H").itemsize
+        self._max_fields_number = max(1, memory_limit // field_size)
+
+    def get_cell_index(self, cell: Tuple[int, int]) -> int:
+        return cell[1] * self.size + cell[0]
+
+    def get_index_cell(self, index: int) -> Tuple[int, int]:
+        return index % self.size, index // self.size
+
+    def get_cell_block(self, cell_index: int) -> NavigationBlock:
+        return self._blocks[self._cell_blocks[cell_index]]
+
+    def get_local_index(self, cell_index: int) -> int:
+        return self._cell_local_indexes[cell_index]
+
+    def get_field(self, target_cell: Tuple[int, int]) -> HierarchicalField:
+        target_index = self.get_cell_index(target_cell)
+        field = self._fields.get(target_index)
+        if field is None:
+            field = HierarchicalField(
+                self, target_index, *self._get_portals_distances(target_index)
+            )
+            self._fields[target_index] = field
+            if len(self._fields) > self._max_fields_number:
+                self._fields.popitem(last=False)
+        else:
+            self._fields.move_to_end(target_index)
+        return field
+
+    def get_distance(self, start_cell, target_cell) -> Optional[int]:
+        distance = self.get_field(target_cell)[self.get_cell_index(start_cell)]
+        if distance != UNREACHABLE:
+            return distance
+
+    def get_next_cell(self, start_cell, target_cell) -> Optional[Tuple[int, int]]:
+        field = self.get_field(target_cell)
+        next_index = field.get_next_index(self.get_cell_index(start_cell))
+        if next_index is not None:
+            return self.get_index_cell(next_index)
+
+    def update_joints(
+        self, changed_joints: Dict[Tuple[int, int], List], is_static: bool
+    ):
+        removed_joints, added_joints = [], []
+        new_cells_joints = []
+        for cell, cell_joints in changed_joints.items():
+            cell_index = self.get_cell_index(cell)
+            old_joints = self._joints[cell_index]
+            new_joints = [self.get_cell_index(joint_cell) for joint_cell in cell_joints]
+            for joint_index in old_joints:
+                if joint_index not in new_joints:
+                    removed_joints.append((cell_index, joint_index))
+            for joint_index in new_joints:
+                if joint_index not in old_joints:
+                    added_joints.append((cell_index, joint_index))
+            new_cells_joints.append((cell_index, new_joints))
+        if not removed_joints and not added_joints:
+            return
+        # Fields are checked against distances of the graph before the change
+        self._update_fields(removed_joints, added_joints)
+        changed_blocks, changed_portal_cells = set(), set()
+        for cell_index, joint_index in removed_joints + added_joints:
+            block_id = self._cell_blocks[cell_index]
+            if self._cell_blocks[joint_index] == block_id:
+                changed_blocks.add(block_id)
+            else:
+                changed_portal_cells.add(cell_index)
+        for cell_index, new_joints in new_cells_joints:
+            self._joints[cell_index] = new_joints
+        for block_id in changed_blocks:
+            block = self._blocks[block_id]
+            changed_block = self._get_block(block_id, block.cells)
+            changed_block.exits, changed_block.entries = block.exits, block.entries
+            self._blocks[block_id] = changed_block
+            self._release_table(block.table)
+        for cell_index in changed_portal_cells:
+            self._update_portal_joints(cell_index)
+
+    def _update_fields(
+        self,
+        removed_joints: List[Tuple[int, int]],
+        added_joints: List[Tuple[int, int]],
+    ):
+        for target_index, field in list(self._fields.items()):
+            # Distances can only grow if a removed joint was on a shortest path,
+            # fields left keep exact distances with new block tables and portals
+            if any(
+                field[cell_index] != UNREACHABLE
+                and field[cell_index] == field[joint_index] + 1
+                for cell_index, joint_index in removed_joints
+            ) or any(
+                field[joint_index] != UNREACHABLE
+                and field[joint_index] + 1 < field[cell_index]
+                for cell_index, joint_index in added_joints
+            ):
+                del self._fields[target_index]
+
+    def _build_blocks(self):
+        for cell_index in range(self.size * self.size):
+            x_coord, y_coord = self.get_index_cell(cell_index)
+            self._cell_blocks[cell_index] = (
+                y_coord // self.block_size * self._blocks_number
+                + x_coord // self.block_size
+            )
+            self._cell_local_indexes[cell_index] = (
+                y_coord % self.block_size * self.block_size + x_coord % self.block_size
+            )
+        blocks_cells: List[List[int]] = [
+            [0] * self.block_size ** 2 for _ in range(self._blocks_number ** 2)
+        ]
+        for cell_index in range(self.size * self.size):
+            block_cells = blocks_cells[self._cell_blocks[cell_index]]
+            block_cells[self._cell_local_indexes[cell_index]] = cell_index
+        for block_id, cells in enumerate(blocks_cells):
+            self._blocks.append(self._get_block(block_id, cells))
+
+    def _get_block(self, block_id: int, cells: List[int]) -> NavigationBlock:
+        local_joints = [
+            [
+                self._cell_local_indexes[joint_index]
+                for joint_index in self._joints[cell_index]
+                if self._cell_blocks[joint_index] == block_id
+            ]
+            for cell_index in cells
+        ]
+        # Blocks with the same inner joints share one table of inner distances
+        signature = tuple(tuple(cell_joints) for cell_joints in local_joints)
+        table = self._block_tables.get(signature)
+        if table is None:
+            table = self._unused_block_tables.pop(signature, None)
+            if table is None:
+                table = BlockTable(local_joints, signature)
+            self._block_tables[signature] = table
+        table.references_number += 1
+        return NavigationBlock(table, cells)
+
+    def _release_table(self, table: BlockTable):
+        table.references_number -= 1
+        if table.references_number == 0:
+            del self._block_tables[table.signature]
+            self._unused_block_tables[table.signature] = table
+            if len(self._unused_block_tables) > MAX_UNUSED_BLOCK_TABLES_NUMBER:
+                self._unused_block_tables.popitem(last=False)
+
+    def _build_portals(self):
+        for cell_index in range(self.size * self.size):
+            x_coord, y_coord = self.get_index_cell(cell_index)
+            if (
+                x_coord % self.block_size in (0, self.block_size - 1)
+                or y_coord % self.block_size in (0, self.block_size - 1)
+            ):
+                self._portal_slots[cell_index] = len(self.exit_joints)
+                self.exit_joints.append([])
+                self._exit_blocks.append(self._cell_blocks[cell_index])
+                self._exit_local_indexes.append(self.get_local_index(cell_index))
+                self._entry_exits.append([])
+        for cell_index in self._portal_slots:
+            self._update_portal_joints(cell_index)
+
+    def _update_portal_joints(self, cell_index: int):
+        exit_slot = self._portal_slots[cell_index]
+        changed_entry_indexes = set()
+        for joint_index, entry_slot in self.exit_joints[exit_slot]:
+            self._entry_exits[entry_slot].remove(exit_slot)
+            changed_entry_indexes.add(joint_index)
+        block_id = self._cell_blocks[cell_index]
+        self.exit_joints[exit_slot] = [
+            (joint_index, self._portal_slots[joint_index])
+            for joint_index in self._joints[cell_index]
+            if self._cell_blocks[joint_index] != block_id
+        ]
+        for joint_index, entry_slot in self.exit_joints[exit_slot]:
+            self._entry_exits[entry_slot].append(exit_slot)
+            changed_entry_indexes.add(joint_index)
+        update_portal(
+            self._blocks[block_id].exits,
+            (self.get_local_index(cell_index), exit_slot),
+            bool(self.exit_joints[exit_slot]),
+        )
+        for joint_index in changed_entry_indexes:
+            entry_slot = self._portal_slots[joint_index]
+            update_portal(
+                self.get_cell_block(joint_index).entries,
+                (self.get_local_index(joint_index), entry_slot),
+                bool(self._entry_exits[entry_slot]),
+            )
+
+    def _get_portals_distances(self, target_index: int) -> Tuple[array, array]:
+        exit_distances = array("H", [UNREACHABLE]) * len(self.exit_joints)
+        entry_distances = array("H", [UNREACHABLE]) * len(self._entry_exits)
+        target_block = self.get_cell_block(target_index)
+        target_table = target_block.table.distances[self.get_local_index(target_index)]
+        heap = []
+        for entry_local_index, entry_slot in target_block.entries:
+            distance = target_table[entry_local_index]
+            if distance != UNREACHABLE:
+                entry_distances[entry_slot] = distance
+                heappush(heap, (distance, ENTRY, entry_slot))
+        # Dijkstra backwards from the target over the abstract graph
+        while heap:
+            distance, node_kind, slot = heappop(heap)
+            if node_kind == ENTRY:
+                if distance > entry_distances[slot]:
+                    continue
+                for exit_slot in self._entry_exits[slot]:
+                    if distance + 1 < exit_distances[exit_slot]:
+                        exit_distances[exit_slot] = distance + 1
+                        heappush(heap, (distance + 1, EXIT, exit_slot))
+            else:
+                if distance > exit_distances[slot]:
+                    continue
+                block = self._blocks[self._exit_blocks[slot]]
+                exit_table = block.table.distances[self._exit_local_indexes[slot]]
+                for entry_local_index, entry_slot in block.entries:
+                    to_exit_distance = exit_table[entry_local_index]
+                    if to_exit_distance == UNREACHABLE:
+                        continue
+                    entry_distance = distance + to_exit_distance
+                    if entry_distance < entry_distances[entry_slot]:
+                        entry_distances[entry_slot] = entry_distance
+                        heappush(heap, (entry_distance, ENTRY, entry_slot))
+        return exit_distances, entry_distances
+
+
+def update_portal(portals: List[Tuple[int, int]], portal: Tuple[int, int], is_used):
+    if is_used and portal not in portals:
+        portals.append(portal)
+    elif not is_used and portal in portals:
+        portals.remove(portal)
@@ -0,0 +1,282 @@
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from common.utils import CellGroups, CellType, get_cell_neighbours, is_joint
+
+UNREACHABLE = 0xFFFF
+DEFAULT_DISTANCE_FIELDS_MEMORY_LIMIT = 32 * 1024 * 1024
+# Multi target fields are short lived, kept only while their targets are current
+MAX_TARGETS_FIELDS_NUMBER = 4
+# Bit order of joints masks, same order as get_cell_neighbours
+JOINT_DIRECTIONS = ((-1, 0), (1, 0), (0, 1), (0, -1))
+
+
+class DistanceFields:
+    def __init__(
+        self,
+        joints_info: Dict[Tuple[int, int], List],
+        size: int,
+        memory_limit: int = DEFAULT_DISTANCE_FIELDS_MEMORY_LIMIT,
+        navigation_cache=None,
+    ):
+        self.size = size
+        self._navigation_cache = navigation_cache
+        self._joints: List[List[int]] = [[] for _ in range(size * size)]
+        self._reverse_joints: List[List[int]] = [[] for _ in range(size * size)]
+        for cell, cell_joints in joints_info.items():
+            cell_index = self.get_cell_index(cell)
+            for joint_cell in cell_joints:
+                joint_index = self.get_cell_index(joint_cell)
+                self._joints[cell_index].append(joint_index)
+                self._reverse_joints[joint_index].append(cell_index)
+        field_size = size * size * array("H").itemsize
+        self._max_fields_number = max(1, memory_limit // field_size)
+        self._fields: OrderedDict = OrderedDict()
+        self._targets_fields: OrderedDict = OrderedDict()
+        # Cached fields on disk only describe the initial board
+        self._is_static = True
+
+    def get_cell_index(self, cell: Tuple[int, int]) -> int:
+        return cell[1] * self.size + cell[0]
+
+    def get_index_cell(self, index: int) -> Tuple[int, int]:
+        return index % self.size, index // self.size
+
+    def get_field(self, target_cell: Tuple[int, int]) -> array:
+        target_index = self.get_cell_index(target_cell)
+        field = self._fields.get(target_index)
+        if field is None:
+            field = self._get_new_field(target_index)
+            self._fields[target_index] = field
+            if len(self._fields) > self._max_fields_number:
+                self._fields.popitem(last=False)
+        else:
+            self._fields.move_to_end(target_index)
+        return field
+
+    def _get_new_field(self, target_index: int):
+        if self._navigation_cache is None or not self._is_static:
+            return get_distance_field(self._reverse_joints, target_index)
+        field = self._navigation_cache.load_field(target_index)
+        if field is None:
+            field = get_distance_field(self._reverse_joints, target_index)
+            self._navigation_cache.save_field(target_index, field)
+        return field
+
+    def get_targets_field(self, target_indexes: FrozenSet[int]) -> array:
+        # Distances to the nearest of the targets, one BFS for all of them
+        field = self._targets_fields.get(target_indexes)
+        if field is None:
+            field = get_distance_field(self._reverse_joints, *target_indexes)
+            self._targets_fields[target_indexes] = field
+            if len(self._targets_fields) > MAX_TARGETS_FIELDS_NUMBER:
+                self._targets_fields.popitem(last=False)
+        else:
+            self._targets_fields.move_to_end(target_indexes)
+        return field
+
+    def get_distance(self, start_cell, target_cell) -> Optional[int]:
+        distance = self.get_field(target_cell)[self.get_cell_index(start_cell)]
+        if distance != UNREACHABLE:
+            return distance
+
+    def get_next_cell(self, start_cell, target_cell) -> Optional[Tuple[int, int]]:
+        return self.get_field_next_cell(self.get_field(target_cell), start_cell)
+
+    def get_field_next_cell(
+        self, field: array, start_cell: Tuple[int, int]
+    ) -> Optional[Tuple[int, int]]:
+        start_index = self.get_cell_index(start_cell)
+        distance = field[start_index]
+        if distance in (0, UNREACHABLE):
+            return None
+        for joint_index in self._joints[start_index]:
+            if field[joint_index] == distance - 1:
+                return self.get_index_cell(joint_index)
+
+    def update_joints(
+        self, changed_joints: Dict[Tuple[int, int], List], is_static: bool
+    ):
+        removed_joints, added_joints = [], []
+        for cell, cell_joints in changed_joints.items():
+            cell_index = self.get_cell_index(cell)
+            old_joints = self._joints[cell_index]
+            new_joints = [self.get_cell_index(joint_cell) for joint_cell in cell_joints]
+            for joint_index in old_joints:
+                if joint_index not in new_joints:
+                    removed_joints.append((cell_index, joint_index))
+                    self._reverse_joints[joint_index].remove(cell_index)
+            for joint_index in new_joints:
+                if joint_index not in old_joints:
+                    added_joints.append((cell_index, joint_index))
+                    self._reverse_joints[joint_index].append(cell_index)
+            self._joints[cell_index] = new_joints
+        self._is_static = is_static
+        if not removed_joints and not added_joints:
+            return
+        for fields in (self._fields, self._targets_fields):
+            self._update_fields(fields, removed_joints, added_joints)
+
+    def _update_fields(
+        self,
+        fields: OrderedDict,
+        removed_joints: List[Tuple[int, int]],
+        added_joints: List[Tuple[int, int]],
+    ):
+        for fields_key, field in list(fields.items()):
+            # Distances can only grow if a removed joint was on a shortest path
+            if any(
+                field[cell_index] != UNREACHABLE
+                and field[cell_index] == field[joint_index] + 1
+                for cell_index, joint_index in removed_joints
+            ):
+                del fields[fields_key]
+                continue
+            if any(
+                field[joint_index] != UNREACHABLE
+                and field[joint_index] + 1 < field[cell_index]
+                for cell_index, joint_index in added_joints
+            ):
+                # Fields mapped from the navigation cache are read only
+                field = array("H", field)
+                repair_distance_field(field, self._reverse_joints, added_joints)
+                fields[fields_key] = field
+
+
+def get_distance_field(reverse_joints: List[List[int]], *target_indexes: int) -> array:
+    field = array("H", [UNREACHABLE]) * len(reverse_joints)
+    for target_index in target_indexes:
+        field[target_index] = 0
+    wave = list(target_indexes)
+    wave_age = 0
+    while wave:
+        wave_age += 1
+        next_wave = []
+        for cell_index in wave:
+            for previous_index in reverse_joints[cell_index]:
+                if field[previous_index] == UNREACHABLE:
+                    field[previous_index] = wave_age
+                    next_wave.append(previous_index)
+        wave = next_wave
+    return field
+
+
+def repair_distance_field(
+    field: array,
+    reverse_joints: List[List[int]],
+    added_joints: List[Tuple[int, int]],
+):
+    queue = deque()
+    for cell_index, joint_index in added_joints:
+        distance = field[joint_index]
+        if distance != UNREACHABLE and distance + 1 < field[cell_index]:
+            field[cell_index] = distance + 1
+            queue.append(cell_index)
+    while queue:
+        cell_index = queue.popleft()
+        for previous_index in reverse_joints[cell_index]:
+            if field[cell_index] + 1 < field[previous_index]:
+                field[previous_index] = field[cell_index] + 1
+                queue.append(previous_index)
+
+
+# Read only board_info-like view of a flat board
+class BoardCellsView(Mapping):
+    def __init__(self, board: bytes, size: int):
+        self._board = board
+        self.size = size
+
+    def __getitem__(self, cell: Tuple[int, int]) -> str:
+        if cell not in self:
+            raise KeyError(cell)
+        return chr(self._board[cell[1] * self.size + cell[0]])
+
+    def __contains__(self, cell) -> bool:
+        return 0 <= cell[0] < self.size and 0 <= cell[1] < self.size
+
+    def __iter__(self):
+        for y_coord in range(self.size):
+            for x_coord in range(self.size):
+                yield x_coord, y_coord
+
+    def __len__(self) -> int:
+        return self.size * self.size
+
+
+class NavigationBoard:
+    def __init__(
+        self,
+        board: bytes,
+        size: int,
+        joints_info: Dict[Tuple[int, int], List],
+        navigator,
+    ):
+        self._initial_board = board
+        self._board = bytearray(board)
+        self._board_info = BoardCellsView(self._board, size)
+        self.size = size
+        self.joints_info = joints_info
+        self.navigator = navigator
+        # Cells differing from the initial board, the board is static without them
+        self._changed_cells_number = 0
+
+    def update_pit_cell(self, cell: Tuple[int, int], cell_type: str) -> bool:
+        if cell_type in CellGroups.OpenPitCellTypes:
+            navigation_cell_type = CellType.Empty
+        elif cell_type in CellGroups.ClosedPitCellTypes:
+            navigation_cell_type = CellType.DrillableBrick
+        else:
+            return False
+        cell_index = cell[1] * self.size + cell[0]
+        if self._board[cell_index] == ord(navigation_cell_type):
+            return False
+        if self._board[cell_index] == self._initial_board[cell_index]:
+            self._changed_cells_number += 1
+        self._board[cell_index] = ord(navigation_cell_type)
+        if self._board[cell_index] == self._initial_board[cell_index]:
+            self._changed_cells_number -= 1
+        changed_cells = [cell] + get_cell_neighbours(cell, self._board_info)
+        changed_joints = get_cells_joints(changed_cells, self._board_info)
+        self.joints_info.update(changed_joints)
+        self.navigator.update_joints(
+            changed_joints, is_static=self._changed_cells_number == 0
+        )
+        return True
+
+
+def get_cells_joints(
+    cells: Iterable[Tuple[int, int]], board_info: Mapping
+) -> Dict[Tuple[int, int], List]:
+    return {
+        cell: [
+            neighbour_cell
+            for neighbour_cell in get_cell_neighbours(cell, board_info)
+            if is_joint(cell, neighbour_cell, board_info)
+        ]
+        for cell in cells
+    }
+
+
+def get_joints_masks(joints_info: Dict[Tuple[int, int], List], size: int) -> bytes:
+    joints_masks = bytearray(size * size)
+    for (x_coord, y_coord), cell_joints in joints_info.items():
+        for joint_x, joint_y in cell_joints:
+            direction = JOINT_DIRECTIONS.index((joint_x - x_coord, joint_y - y_coord))
+            joints_masks[y_coord * size + x_coord] |= 1 << direction
+    return bytes(joints_masks)
+
+
+def get_joints_info_from_masks(
+    joints_masks: bytes, size: int
+) -> Dict[Tuple[int, int], List]:
+    joints_info = {}
+    for cell_index, joints_mask in enumerate(joints_masks):
+        x_coord, y_coord = cell_index % size, cell_index // size
+        joints_info[(x_coord, y_coord)] = [
+            (x_coord + x_shift, y_coord + y_shift)
+            for direction, (x_shift, y_shift) in enumerate(JOINT_DIRECTIONS)
+            if joints_mask & (1 << direction)
+        ]
+    return joints_info
@@ -0,0 +1,136 @@
+import mmap
+import os
+import shutil
+import struct
+from array import array
+from hashlib import sha1
+from logging import getLogger
+from tempfile import mkstemp
+from typing import List, Optional, Tuple
+
+logger = getLogger()
+
+NAVIGATION_CACHE_DIR = ".navigation_cache"
+NAVIGATION_CACHE_VERSION = 1
+JOINTS_FILE_NAME = "joints"
+FIELDS_DIR_NAME = "fields"
+# Boards beyond this number are evicted from the cache, least recently used first
+MAX_CACHED_BOARDS_NUMBER = 256
+
+# magic, version, board size, followed by board bytes and joints masks
+NAVIGATION_DATA_HEADER = struct.Struct("!4sBH")
+NAVIGATION_DATA_MAGIC = b"LRNV"
+NAVIGATION_DATA_VERSION = 1
+
+
+def get_board_hash(board_layers: List[str]) -> str:
+    board_text = "\n".join([str(NAVIGATION_CACHE_VERSION)] + board_layers)
+    return sha1(board_text.encode()).hexdigest()
+
+
+def encode_navigation_data(size: int, board_bytes: bytes, joints_masks: bytes) -> bytes:
+    header = NAVIGATION_DATA_HEADER.pack(
+        NAVIGATION_DATA_MAGIC, NAVIGATION_DATA_VERSION, size
+    )
+    return header + board_bytes + joints_masks
+
+
+def decode_navigation_data(data: bytes) -> Tuple[int, bytes, bytes]:
+    if len(data) < NAVIGATION_DATA_HEADER.size:
+        raise ValueError("Navigation data is truncated")
+    magic, version, size = NAVIGATION_DATA_HEADER.unpack_from(data)
+    if magic != NAVIGATION_DATA_MAGIC or version != NAVIGATION_DATA_VERSION:
+        raise ValueError("Navigation data has unsupported format")
+    cells_number = size * size
+    if len(data) != NAVIGATION_DATA_HEADER.size + 2 * cells_number:
+        raise ValueError("Navigation data doesn't match board size")
+    board_start = NAVIGATION_DATA_HEADER.size
+    board_bytes = bytes(data[board_start : board_start + cells_number])
+    joints_masks = bytes(data[board_start + cells_number :])
+    return size, board_bytes, joints_masks
+
+
+class NavigationCache:
+    def __init__(
+        self,
+        cache_dir: str,
+        board_hash: str,
+        size: int,
+        with_fields: bool = False,
+        max_boards_number: int = MAX_CACHED_BOARDS_NUMBER,
+    ):
+        self._board_dir = os.path.join(cache_dir, board_hash)
+        self._fields_dir = os.path.join(self._board_dir, FIELDS_DIR_NAME)
+        self._cells_number = size * size
+        self._is_writable = True
+        try:
+            os.makedirs(
+                self._fields_dir if with_fields else self._board_dir, exist_ok=True
+            )
+            # Modification time of board directories orders them for eviction
+            os.utime(self._board_dir)
+        except OSError as err:
+            logger.warning(f"Navigation cache is read only: {err}")
+            self._is_writable = False
+        else:
+            evict_boards(cache_dir, max_boards_number)
+
+    def load_joints_masks(self) -> Optional[bytes]:
+        joints_masks = self._load(os.path.join(self._board_dir, JOINTS_FILE_NAME))
+        if joints_masks is not None and len(joints_masks) == self._cells_number:
+            return bytes(joints_masks)
+
+    def save_joints_masks(self, joints_masks: bytes):
+        self._save(os.path.join(self._board_dir, JOINTS_FILE_NAME), joints_masks)
+
+    def load_field(self, target_index: int) -> Optional[memoryview]:
+        field_bytes = self._load(self._get_field_path(target_index))
+        field_size = self._cells_number * array("H").itemsize
+        if field_bytes is not None and len(field_bytes) == field_size:
+            return field_bytes.cast("H")
+
+    def save_field(self, target_index: int, field: array):
+        self._save(self._get_field_path(target_index), field.tobytes())
+
+    def _get_field_path(self, target_index: int) -> str:
+        return os.path.join(self._fields_dir, str(target_index))
+
+    @staticmethod
+    def _load(path: str) -> Optional[memoryview]:
+        try:
+            with open(path, "rb") as cache_file:
+                return memoryview(
+                    mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+                )
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, path: str, data: bytes):
+        if not self._is_writable:
+            return
+        # Written aside and renamed, so concurrent readers never see partial files
+        try:
+            file_descriptor, temp_path = mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(file_descriptor, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except OSError as err:
+            logger.warning(f"Couldn't save navigation cache file '{path}': {err}")
+            self._is_writable = False
+
+
+def evict_boards(cache_dir: str, max_boards_number: int):
+    try:
+        boards_dirs = [
+            entry
+            for entry in os.scandir(cache_dir)
+            if entry.is_dir(follow_symlinks=False)
+        ]
+    except OSError:
+        return
+    if len(boards_dirs) <= max_boards_number:
+        return
+    boards_dirs.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in boards_dirs[: len(boards_dirs) - max_boards_number]:
+        # Mapped files of a removed board stay readable for processes using them
+        shutil.rmtree(entry.path, ignore_errors=True)
@@ -0,0 +1,62 @@
+from logging import getLogger
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional, Set
+
+logger = getLogger()
+
+SHARED_MEMORY_PREFIX = "lode_runner_"
+# Shared memory names are limited to 31 characters on some platforms
+SHARED_MEMORY_HASH_LENGTH = 16
+HEADER_SIZE = 1
+IS_READY = 1
+
+
+def get_shared_memory_name(board_hash: str) -> str:
+    return SHARED_MEMORY_PREFIX + board_hash[:SHARED_MEMORY_HASH_LENGTH]
+
+
+class SharedJointsMasks:
+    # Joints masks of boards kept once in shared memory for all bot processes of
+    # a host, the first byte of a segment is set only after the masks are written
+    def __init__(self):
+        self._segments: Dict[str, SharedMemory] = {}
+        self._created_hashes: Set[str] = set()
+
+    def load_joints_masks(self, board_hash: str, size: int) -> Optional[bytes]:
+        segment = self._segments.get(board_hash)
+        if segment is None:
+            try:
+                segment = SharedMemory(get_shared_memory_name(board_hash))
+            except (OSError, ValueError):
+                return None
+        cells_number = size * size
+        if segment.size < HEADER_SIZE + cells_number or segment.buf[0] != IS_READY:
+            segment.close()
+            return None
+        self._segments[board_hash] = segment
+        return bytes(segment.buf[HEADER_SIZE : HEADER_SIZE + cells_number])
+
+    def save_joints_masks(self, board_hash: str, joints_masks: bytes):
+        try:
+            segment = SharedMemory(
+                get_shared_memory_name(board_hash),
+                create=True,
+                size=HEADER_SIZE + len(joints_masks),
+            )
+        except FileExistsError:
+            return
+        except OSError as err:
+            logger.warning(f"Couldn't share joints masks of board {board_hash}: {err}")
+            return
+        segment.buf[HEADER_SIZE : HEADER_SIZE + len(joints_masks)] = joints_masks
+        segment.buf[0] = IS_READY
+        self._segments[board_hash] = segment
+        self._created_hashes.add(board_hash)
+
+    def close(self):
+        for board_hash, segment in self._segments.items():
+            segment.close()
+            if board_hash in self._created_hashes:
+                segment.unlink()
+        self._segments.clear()
+        self._created_hashes.clear()
@@ -1,7 +1,5 @@
-from functools import partial
-from itertools import chain
+from functools import lru_cache
 from logging import getLogger
-from multiprocessing import Pool, cpu_count
 from typing import Dict, Tuple, List
 
 
@@ -12,6 +10,14 @@ GUARD = "Guard"
 SPECTATOR = "Spectator"
 ADMIN = "Admin"
 
+JSON_FORMAT = "json"
+DELTA_FORMAT = "delta"
+BINARY_FORMAT = "binary"
+BROADCAST_FORMATS = (JSON_FORMAT, DELTA_FORMAT, BINARY_FORMAT)
+
+DEFAULT_ROOM = "default"
+MAX_ROOM_NAME_LENGTH = 64
+
 
 def get_board_info(board_layers: List[str]) -> Dict[Tuple[int, int], str]:
     board_info: Dict[Tuple[int, int], str] = {}
@@ -29,6 +35,7 @@ def get_board_info(board_layers: List[str]) -> Dict[Tuple[int, int], str]:
 
 class CharCode:
     @classmethod
+    @lru_cache(maxsize=None)
     def get_valid_codes(cls):
         return [
             getattr(cls, attr)
@@ -144,6 +151,10 @@ class CellGroups(object):
 
     FloorCellTypes = [ct.DrillableBrick, ct.UnbreakableBrick, ct.Ladder]
 
+    OpenPitCellTypes = [ct.Empty, ct.PitFill4, ct.PitFill3, ct.PitFill2, ct.PitFill1]
+
+    ClosedPitCellTypes = [ct.DrillableBrick, ct.Drill, ct.PitFilled]
+
     @classmethod
     def get_hero_cell_type(cls, player_cell_type):
         player_hero_info = dict(zip(cls.PlayerCellTypes, cls.HeroCellTypes))
@@ -198,29 +209,8 @@ class Drill(CharCode):
     DrillLeft = "DrillLeft"
 
 
-def get_global_wave_age_info(joints_info, board_info):
-    get_wave_age_info_for_joints_info = partial(get_wave_age_info, joints_info)
-    pool = Pool(cpu_count())
-    logger.info("Start calculating global wave age info ...")
-    global_wave_age_info = {
-        el[0]: el[1]
-        for el in pool.map(get_wave_age_info_for_joints_info, board_info.keys())
-    }
-    pool.close()
-    logger.info("Global wave age info has been calculated")
-    return global_wave_age_info
-
-
-def get_wave_age_info(joints_info, start_cell):
-    wave_info = {}
-    wave_age = 1
-    joints = joints_info[start_cell]
-    while joints:
-        wave_info.update({cell: wave_age for cell in joints})
-        joints = set(list(chain(*[joints_info[cell] for cell in joints])))
-        joints = joints - set(wave_info.keys())
-        wave_age += 1
-    return start_cell, wave_info
+class ClientCommand(CharCode):
+    Resync = "Resync"
 
 
 def get_joints_info(
@@ -259,18 +249,17 @@ def is_joint(current_cell, next_cell, board_info):
     return True
 
 
-def get_next_target_age(global_wave_age_info, joints_info, target_cells, start_cell):
-    age_info = global_wave_age_info[start_cell]
-    target_candidates = [cell for cell in target_cells if cell in age_info]
-    if target_candidates:
-        target_cell = next_cell = min(target_candidates, key=lambda x: age_info[x])
-        real_age = age = age_info[next_cell]
-        while age > 1:
-            age -= 1
-            neighbours = get_cell_neighbours(next_cell, global_wave_age_info.keys())
-            next_cell = [
-                cell
-                for cell in neighbours
-                if next_cell in joints_info[cell] and age_info.get(cell) == age
-            ][0]
+def get_next_target_age(distance_fields, target_cells, start_cell):
+    target_ages = []
+    for target_cell in target_cells:
+        age = distance_fields.get_distance(start_cell, target_cell)
+        if age:
+            target_ages.append((age, target_cell))
+    if target_ages:
+        real_age, target_cell = min(target_ages, key=lambda x: x[0])
+        next_cell = distance_fields.get_next_cell(start_cell, target_cell)
         return next_cell, target_cell, real_age
+
+
+def get_milliseconds(seconds: float) -> float:
+    return round(seconds * 1000, 1)
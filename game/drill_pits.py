@@ -0,0 +1,93 @@
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from common.utils import CellType
+
+DRILL_SCENARIO = [
+    CellType.Drill,
+    CellType.Empty,
+    CellType.Empty,
+    CellType.Empty,
+    CellType.Empty,
+    CellType.Empty,
+    CellType.PitFill4,
+    CellType.PitFill3,
+    CellType.PitFill2,
+    CellType.PitFill1,
+    CellType.PitFilled,
+    CellType.DrillableBrick,
+]
+# Scenario steps on which the pit cell changes its type
+DRILL_SCENARIO_TRANSITIONS = [
+    step
+    for step, cell_type in enumerate(DRILL_SCENARIO)
+    if step == 0 or cell_type != DRILL_SCENARIO[step - 1]
+]
+PIT_FILLED_STEP = DRILL_SCENARIO.index(CellType.PitFilled)
+
+
+class DrillPit:
+    def __init__(self, cell: Tuple, owner_id: UUID, start_tick: int):
+        self.cell = cell
+        self.owner_id = owner_id
+        self.start_tick = start_tick
+        self.step: Optional[int] = None
+        self.cell_type = CellType.DrillableBrick
+
+    def is_filled(self) -> bool:
+        return self.step == PIT_FILLED_STEP
+
+    def is_closed(self) -> bool:
+        return self.step == len(DRILL_SCENARIO) - 1
+
+
+class DrillPits:
+    def __init__(self):
+        self._pits: Dict[Tuple, DrillPit] = {}
+        # Timing wheel, pits are scheduled only on ticks where they change
+        self._wheel: List[List[DrillPit]] = [[] for _ in DRILL_SCENARIO]
+        self._tick = 0
+
+    def __contains__(self, cell: Tuple) -> bool:
+        return cell in self._pits
+
+    def __len__(self) -> int:
+        return len(self._pits)
+
+    def get_pit(self, cell: Tuple) -> Optional[DrillPit]:
+        return self._pits.get(cell)
+
+    def get_next_cell_type(self, cell: Tuple) -> str:
+        return DRILL_SCENARIO[self._tick - self._pits[cell].start_tick]
+
+    def get_cells_types(self) -> Dict[Tuple, str]:
+        return {cell: pit.cell_type for cell, pit in self._pits.items()}
+
+    def add_pit(self, cell: Tuple, owner_id: UUID):
+        pit = DrillPit(cell, owner_id, self._tick)
+        self._pits[cell] = pit
+        self._schedule(pit, DRILL_SCENARIO_TRANSITIONS[0])
+
+    def pop_changed_pits(self) -> List[DrillPit]:
+        self._tick += 1
+        slot = self._tick % len(self._wheel)
+        changed_pits, self._wheel[slot] = self._wheel[slot], []
+        for pit in changed_pits:
+            pit.step = self._tick - pit.start_tick - 1
+            pit.cell_type = DRILL_SCENARIO[pit.step]
+            if pit.is_closed():
+                del self._pits[pit.cell]
+            else:
+                next_transition = DRILL_SCENARIO_TRANSITIONS[
+                    DRILL_SCENARIO_TRANSITIONS.index(pit.step) + 1
+                ]
+                self._schedule(pit, next_transition)
+        return changed_pits
+
+    def clear(self):
+        self._pits.clear()
+        for slot in self._wheel:
+            slot.clear()
+
+    def _schedule(self, pit: DrillPit, step: int):
+        self._wheel[(pit.start_tick + step + 1) % len(self._wheel)].append(pit)
@@ -1,18 +1,32 @@
-from copy import deepcopy
 from itertools import chain
 from logging import getLogger
-from random import choice
-from typing import List
+from random import Random, getrandbits
+from typing import Dict, List, Optional, Set, Tuple
 
+from common.board_frame import get_board_layers_from_bytes
+from common.hierarchical_navigation import HierarchicalNavigator
+from common.navigation import (
+    DEFAULT_DISTANCE_FIELDS_MEMORY_LIMIT,
+    DistanceFields,
+    NavigationBoard,
+    get_joints_info_from_masks,
+    get_joints_masks,
+)
+from common.navigation_cache import (
+    NavigationCache,
+    encode_navigation_data,
+    get_board_hash,
+)
 from common.utils import (
     PLAYER,
     CellType,
     get_board_info,
     CellGroups,
-    get_global_wave_age_info,
     get_joints_info,
     get_lower_cell,
 )
+from game.game_participants import CellOccupancy
+from game.indexed_set import IndexedSet
 
 logger = getLogger()
 
@@ -36,43 +50,145 @@ HORIZ_FLIP_BLOCK = [line[::1] for line in BOARD_BLOCK]
 VERT_HORIZ_FLIP_BLOCK = [line[::-1] for line in BOARD_BLOCK[::-1]]
 BLOCKS = [BOARD_BLOCK, VERT_FLIP_BLOCK, HORIZ_FLIP_BLOCK, VERT_HORIZ_FLIP_BLOCK]
 DEFAULT_GOLD_CELLS_NUMBER = 30
+# Block level navigation is opt-in, with moving players its fields cost more to
+# build than flat ones on boards tried so far
+HIERARCHICAL_NAVIGATION_MIN_BLOCKS = 0
+
+EMPTY_CODE = ord(CellType.Empty)
+FALL_THROUGH_CODES = frozenset(
+    ord(cell_type) for cell_type in CellGroups.EmptyCellTypes + [CellType.Pipe]
+)
+FLOOR_CODES = frozenset(ord(cell_type) for cell_type in CellGroups.FloorCellTypes)
+NOT_FALLING_CODES = frozenset([ord(CellType.Pipe), ord(CellType.Ladder)])
 
 
 class GameBoard:
-    blocks_number = BLOCKS_NUMBER
+    distance_fields_memory_limit = DEFAULT_DISTANCE_FIELDS_MEMORY_LIMIT
+    navigation_cache_dir: Optional[str] = None
+    # Distance fields on disk take up to 2 * cells ** 2 bytes per board
+    navigation_cache_fields = False
+    hierarchical_navigation_min_blocks = HIERARCHICAL_NAVIGATION_MIN_BLOCKS
 
-    def __init__(self, board_layers: List[str]):
+    def __init__(self, board_layers: List[str], random_seed: Optional[int] = None):
         self.size = len(board_layers)
-        self._initial_board_info = get_board_info(board_layers)
-        self._board_info = deepcopy(self._initial_board_info)
-        self.joints_info = get_joints_info(self._initial_board_info)
-        self.global_wave_age_info = get_global_wave_age_info(
-            self.joints_info, self._initial_board_info
+        self.board_layers = board_layers
+        # Own random generator makes the game on this board reproducible by seed
+        self.random_seed = getrandbits(32) if random_seed is None else random_seed
+        self.random = Random(self.random_seed)
+        board_info = get_board_info(board_layers)
+        # Flat grids indexed by y * size + x, one cell code byte per cell
+        self._initial_board: bytes = "".join(board_layers).encode()
+        self._board: bytearray = bytearray(self._initial_board)
+        self._changed_cells: Set[int] = set()
+        self._empty_cells = IndexedSet(
+            index
+            for index, cell_code in enumerate(self._board)
+            if cell_code == EMPTY_CODE
+        )
+        # Gold spawns only on cells standing on floor of the initial board
+        self._floor_supported_cells = bytes(
+            index >= len(self._board) - self.size
+            or self._initial_board[index + self.size] in FLOOR_CODES
+            for index in range(len(self._board))
+        )
+        self._empty_cells_on_bricks = IndexedSet(
+            index for index in self._empty_cells if self._floor_supported_cells[index]
+        )
+        self.board_hash = get_board_hash(board_layers)
+        navigation_cache = None
+        if self.navigation_cache_dir:
+            navigation_cache = NavigationCache(
+                self.navigation_cache_dir,
+                self.board_hash,
+                self.size,
+                with_fields=self.navigation_cache_fields,
+            )
+        self.joints_info = self._get_joints_info(board_info, navigation_cache)
+        # Joints info follows open pits, the masks keep joints of the initial board
+        self._initial_joints_masks = get_joints_masks(self.joints_info, self.size)
+        self._navigation_data: Optional[bytes] = None
+        self.navigator = self._get_navigator(
+            self.joints_info,
+            navigation_cache if self.navigation_cache_fields else None,
+        )
+        self._navigation_board = NavigationBoard(
+            self._initial_board, self.size, self.joints_info, self.navigator
         )
-        self.gold_cells = []
+        self.occupancy = CellOccupancy()
+        self.gold_cells = IndexedSet()
         self.init_gold_cells()
 
+    def _get_joints_info(self, board_info, navigation_cache):
+        if navigation_cache is not None:
+            joints_masks = navigation_cache.load_joints_masks()
+            if joints_masks is not None:
+                logger.info(f"Loaded navigation data of board {self.board_hash}")
+                return get_joints_info_from_masks(joints_masks, self.size)
+        joints_info = get_joints_info(board_info)
+        if navigation_cache is not None:
+            navigation_cache.save_joints_masks(get_joints_masks(joints_info, self.size))
+        return joints_info
+
+    def _get_navigator(self, joints_info, navigation_cache):
+        return get_navigator(
+            joints_info,
+            self.size,
+            self.distance_fields_memory_limit,
+            self.hierarchical_navigation_min_blocks,
+            navigation_cache,
+        )
+
+    def get_planning_data(self) -> Tuple:
+        # Initial board and navigation settings, enough to rebuild its navigation
+        # in another process
+        return (
+            self.board_hash,
+            self.size,
+            self._initial_board,
+            self._initial_joints_masks,
+            self.distance_fields_memory_limit,
+            self.hierarchical_navigation_min_blocks,
+        )
+
+    def get_navigation_data(self) -> bytes:
+        # Static board with its joints, served to clients so they don't rebuild them
+        if self._navigation_data is None:
+            self._navigation_data = encode_navigation_data(
+                self.size,
+                self._initial_board,
+                self._initial_joints_masks,
+            )
+        return self._navigation_data
+
     def init_gold_cells(self, number=DEFAULT_GOLD_CELLS_NUMBER):
         for _ in range(number):
             self.spawn_gold_cell()
 
     def spawn_gold_cell(self):
-        cell = choice(self.get_empty_cells_on_bricks())
-        self.gold_cells.append(cell)
-        self._board_info[cell] = CellType.Gold
+        cell = self.get_index_cell(
+            self._empty_cells_on_bricks.get_random_item(self.random)
+        )
+        self.gold_cells.add(cell)
+        self.update_board(cell, CellType.Gold)
 
     def empty_gold_cells(self):
         while self.gold_cells:
-            self._board_info.update({self.gold_cells.pop(): CellType.Empty})
+            self.update_board(self.gold_cells.pop(), CellType.Empty)
 
     @classmethod
-    def from_blocks_number(cls, blocks_number: int = BLOCKS_NUMBER):
-        cls.blocks_number = blocks_number
+    def from_blocks_number(
+        cls, blocks_number: int = BLOCKS_NUMBER, random_seed: Optional[int] = None
+    ):
+        if random_seed is None:
+            random_seed = getrandbits(32)
+        blocks_random = Random(random_seed)
         board_blocks: List[str] = []
         for vert_idx in range(blocks_number):
-            current_layer_blocks = [choice(BLOCKS) for _ in range(blocks_number)]
+            current_layer_blocks = [
+                blocks_random.choice(BLOCKS) for _ in range(blocks_number)
+            ]
             board_blocks.extend(cls._get_concatenated_blocks_layer(current_layer_blocks))
-        return cls(board_blocks)
+        return cls(board_blocks, random_seed)
 
     @staticmethod
     def _get_concatenated_blocks_layer(layer_blocks: List[List]) -> List[str]:
@@ -81,21 +197,34 @@ class GameBoard:
             for line in range(BLOCK_SIZE)
         ]
 
-    def get_board_layers(self, cell, direction):
-        board_list = []
-        for y in range(self.size):
-            board_list.append([self._board_info[(x, y)] for x in range(self.size)])
-        if cell:
-            self._update_board_list_by_hero(
-                board_list=board_list, cell=cell, direction=direction
-            )
-        return board_list
+    @property
+    def blocks_number(self) -> int:
+        return self.size // BLOCK_SIZE
+
+    def get_cell_index(self, cell: Tuple[int, int]) -> int:
+        return cell[1] * self.size + cell[0]
+
+    def get_index_cell(self, index: int) -> Tuple[int, int]:
+        return index % self.size, index // self.size
+
+    def get_board_layers(self):
+        return get_board_layers_from_bytes(self._board, self.size)
 
-    def _update_board_list_by_hero(self, board_list, cell, direction):
+    def get_board_bytes(self) -> bytes:
+        return bytes(self._board)
+
+    def get_hero_cell_type(self, cell, direction):
         player_cell_type = self.get_participant_on_cell_type(
             cell=cell, participant_type=PLAYER, direction=direction
         )
-        board_list[cell[1]][cell[0]] = CellGroups.get_hero_cell_type(player_cell_type)
+        return CellGroups.get_hero_cell_type(player_cell_type)
+
+    def pop_board_diff(self) -> Dict[int, str]:
+        board_diff = {
+            index: chr(self._board[index]) for index in self._changed_cells
+        }
+        self._changed_cells.clear()
+        return board_diff
 
     def get_participant_on_cell_type(self, cell, participant_type, direction):
         cell_type = self.get_initial_cell_type(cell)
@@ -118,53 +247,89 @@ class GameBoard:
         )
 
     def process_move(
-        self, current_cell, next_cell, next_cell_type, is_cell_in_scenarios
+        self, current_cell, next_cell, next_cell_type, current_pit_cell_type=None
     ):
-        if not is_cell_in_scenarios:
+        if current_pit_cell_type is None:
             self.restore_original_cell(current_cell)
+        else:
+            self.update_board(current_cell, current_pit_cell_type)
         self.update_board(cell=next_cell, cell_type=next_cell_type)
 
     def get_initial_cell_type(self, cell):
-        return self._initial_board_info[cell]
+        return chr(self._initial_board[self.get_cell_index(cell)])
+
+    def get_cell_type(self, cell):
+        return chr(self._board[self.get_cell_index(cell)])
 
     def update_board(self, cell, cell_type):
-        self._board_info[cell] = cell_type
+        self._set_cell_code(self._get_valid_cell_index(cell), ord(cell_type))
+
+    def update_pit_cell(self, cell, cell_type):
+        self._navigation_board.update_pit_cell(cell, cell_type)
 
     def restore_original_cell(self, cell):
-        self._board_info[cell] = self._initial_board_info[cell]
+        index = self._get_valid_cell_index(cell)
+        self._set_cell_code(index, self._initial_board[index])
+
+    def _get_valid_cell_index(self, cell):
+        # Off-board cells would wrap onto another row of the flat grid
+        if not self.is_cell_valid(cell):
+            raise IndexError(f"Cell {cell} is out of the board of size {self.size}")
+        return self.get_cell_index(cell)
+
+    def _set_cell_code(self, index, cell_code):
+        previous_cell_code = self._board[index]
+        if previous_cell_code == cell_code:
+            return
+        self._board[index] = cell_code
+        self._changed_cells.add(index)
+        if previous_cell_code == EMPTY_CODE:
+            self._empty_cells.discard(index)
+            self._empty_cells_on_bricks.discard(index)
+        elif cell_code == EMPTY_CODE:
+            self._empty_cells.add(index)
+            if self._floor_supported_cells[index]:
+                self._empty_cells_on_bricks.add(index)
 
     def get_empty_cells(self):
-        return [
-            cell
-            for cell, cell_type in self._board_info.items()
-            if cell_type == CellType.Empty
-        ]
+        return [self.get_index_cell(index) for index in self._empty_cells]
 
     def get_empty_cells_on_bricks(self):
-        empty_on_floor = []
-        for cell in self.get_empty_cells():
-            lower_cell_code = self._initial_board_info.get(get_lower_cell(cell))
-            if lower_cell_code is None:
-                empty_on_floor.append(cell)
-            elif lower_cell_code in CellGroups.FloorCellTypes:
-                empty_on_floor.append(cell)
-        return empty_on_floor
+        return [self.get_index_cell(index) for index in self._empty_cells_on_bricks]
+
+    def get_random_empty_cell(self):
+        return self.get_index_cell(self._empty_cells.get_random_item(self.random))
 
     def is_cell_valid(self, cell):
-        return cell in self._initial_board_info
+        return 0 <= cell[0] < self.size and 0 <= cell[1] < self.size
 
     def can_fall_from_here(self, cell):
-        lower_cell_code = self._board_info.get(get_lower_cell(cell))
-        if lower_cell_code is None:
+        lower_cell = get_lower_cell(cell)
+        if not self.is_cell_valid(lower_cell):
             return False
-        if (
-            lower_cell_code != CellType.Pipe
-            and lower_cell_code not in CellGroups.EmptyCellTypes
-        ):
+        index = self.get_cell_index(cell)
+        if self._board[index + self.size] not in FALL_THROUGH_CODES:
             return False
-        if self._initial_board_info[cell] in [CellType.Pipe, CellType.Ladder]:
+        if self._initial_board[index] in NOT_FALLING_CODES:
             return False
         return True
 
 
+def get_navigator(
+    joints_info,
+    size: int,
+    memory_limit: int,
+    hierarchical_navigation_min_blocks: int,
+    navigation_cache=None,
+):
+    if (
+        hierarchical_navigation_min_blocks
+        and size % BLOCK_SIZE == 0
+        and size // BLOCK_SIZE >= hierarchical_navigation_min_blocks
+    ):
+        logger.info("Using hierarchical navigation over board blocks")
+        return HierarchicalNavigator(joints_info, size, BLOCK_SIZE, memory_limit)
+    return DistanceFields(joints_info, size, memory_limit, navigation_cache)
+
+
 # TODO: implement rectangular board support
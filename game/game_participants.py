@@ -1,6 +1,6 @@
 from logging import getLogger
-from random import choice
-from typing import Tuple, Dict, Type
+import random
+from typing import Tuple, Dict, List, Optional, Type
 from uuid import UUID
 
 from common.utils import Move
@@ -14,12 +14,18 @@ CATCH_Player_REWARD = 100
 class BaseParticipant:
     subclasses_info: Dict[str, Type] = {}
 
-    def __init__(self, participant_id: str, cell: Tuple, name: str):
+    def __init__(
+        self,
+        participant_id: str,
+        cell: Tuple,
+        name: str,
+        direction: Optional[str] = None,
+    ):
         self._participant_id = participant_id
         self.cell = cell
         self.name = name
         self.is_allowed_to_act = True
-        self.direction = get_random_direction()
+        self.direction = direction or get_random_direction()
         logger.debug(
             "Created participant '%s' object: %s" % (self._participant_type, vars(self))
         )
@@ -29,8 +35,17 @@ class BaseParticipant:
         cls.subclasses_info[cls.__name__] = cls
 
     @classmethod
-    def get_participant(cls, participant_type: str, participant_id: UUID, cell: Tuple, name: str):
-        return cls.subclasses_info[participant_type](participant_id, cell, name)
+    def get_participant(
+        cls,
+        participant_type: str,
+        participant_id: UUID,
+        cell: Tuple,
+        name: str,
+        direction: Optional[str] = None,
+    ):
+        return cls.subclasses_info[participant_type](
+            participant_id, cell, name, direction
+        )
 
     @property
     def _participant_type(self):
@@ -70,8 +85,10 @@ class BaseParticipant:
 
 
 class Player(BaseParticipant):
-    def __init__(self, player_id, cell, name):
-        super().__init__(participant_id=player_id, cell=cell, name=name)
+    def __init__(self, player_id, cell, name, direction=None):
+        super().__init__(
+            participant_id=player_id, cell=cell, name=name, direction=direction
+        )
         self.score = {"permanent": 0, "temporary": 0}
 
     def re_spawn(self, spawn_cell):
@@ -97,5 +114,44 @@ class Guard(BaseParticipant):
         logger.warning("Guard has been respown")
 
 
-def get_random_direction():
-    return choice([Move.Left, Move.Right])
+class CellOccupancy:
+    def __init__(self):
+        self._cells_participants: Dict[Tuple, List[BaseParticipant]] = {}
+
+    def add(self, participant: BaseParticipant):
+        self._cells_participants.setdefault(participant.cell, []).append(participant)
+
+    def remove(self, participant: BaseParticipant):
+        cell_participants = self._cells_participants.get(participant.cell)
+        if cell_participants and participant in cell_participants:
+            cell_participants.remove(participant)
+            if not cell_participants:
+                del self._cells_participants[participant.cell]
+
+    def move(self, participant: BaseParticipant, next_cell: Tuple):
+        self.remove(participant)
+        participant.move(next_cell)
+        self.add(participant)
+
+    def re_spawn(self, participant: BaseParticipant, spawn_cell: Tuple):
+        self.remove(participant)
+        participant.re_spawn(spawn_cell)
+        self.add(participant)
+
+    def get_participant(self, cell: Tuple) -> Optional[BaseParticipant]:
+        cell_participants = self._cells_participants.get(cell)
+        if cell_participants:
+            return cell_participants[0]
+
+    def is_occupied(self, cell: Tuple) -> bool:
+        return cell in self._cells_participants
+
+    def is_occupied_by(self, cell: Tuple, participant_type: str) -> bool:
+        return any(
+            participant.get_type() == participant_type
+            for participant in self._cells_participants.get(cell, ())
+        )
+
+
+def get_random_direction(rng=random):
+    return rng.choice([Move.Left, Move.Right])
@@ -1,24 +1,38 @@
 import json
 import time
-from copy import deepcopy
 from functools import wraps
-from itertools import chain
 from logging import getLogger
-from random import choice, shuffle
-from typing import Callable, Dict, List, Tuple, Any, Union, Optional
+from typing import Callable, Dict, List, Tuple, Any, Union, Optional, Set
 from uuid import uuid4, UUID
 
+from common.board_frame import BoardFrameEncoder
 from common.utils import (
     PLAYER,
     GUARD,
     SPECTATOR,
+    DELTA_FORMAT,
+    BINARY_FORMAT,
     CellType,
     Move,
     Drill,
-    get_next_target_age,
 )
+from game.drill_pits import DrillPits
 from game.game_board import GameBoard
-from game.game_participants import BaseParticipant, Guard, Player
+from game.game_participants import (
+    BaseParticipant,
+    Guard,
+    Player,
+    get_random_direction,
+)
+from game.guards_planner import (
+    GuardsPlanner,
+    get_greedy_guards_moves,
+    get_guards_moves,
+)
+from game.replay import ReplayRecorder, get_replay_recorder
+from game.tick_scheduler import SKIP_POLICY, TickScheduler
+from game.session_snapshot import SessionSnapshot
+from utils.metrics import Counter, Histogram
 
 logger = getLogger()
 
@@ -27,21 +41,30 @@ TICK_TIME = 0.5
 DEFAULT_SESSION_TIMESPAN = 15 * 60
 GUARD_DESTROY_TIMEOUT = 1
 GUARD_NAME_PREFIX = "AI_"
-DRILL_SCENARIO = [
-    CellType.Drill,
-    CellType.Empty,
-    CellType.Empty,
-    CellType.Empty,
-    CellType.Empty,
-    CellType.Empty,
-    CellType.PitFill4,
-    CellType.PitFill3,
-    CellType.PitFill2,
-    CellType.PitFill1,
-    CellType.PitFilled,
-    CellType.DrillableBrick,
+DELTA_KEYFRAME_INTERVAL = 20
+# Session methods called by every tick, in the order they run
+TICK_PHASES = [
+    "process_pending_actions",
+    "cleanup_die_cells",
+    "move_guards",
+    "process_gravity",
+    "process_drill_scenario",
+    "plan_guards",
+    "broadcast",
 ]
 
+TICK_PHASE_SECONDS = Histogram(
+    "lode_runner_tick_phase_seconds", "Duration of game tick phases", ["phase"]
+)
+SENT_MESSAGES = Counter(
+    "lode_runner_sent_messages_total",
+    "Messages broadcast to clients",
+    ["client_type"],
+)
+SENT_BYTES = Counter(
+    "lode_runner_sent_bytes_total", "Bytes broadcast to clients", ["client_type"]
+)
+
 AdminCommands = []
 
 
@@ -58,19 +81,44 @@ def admin_command_decorator(func):
 
 
 class LodeRunnerGameSession:
-    def __init__(self, loop, game_board: GameBoard):
+    tick_overrun_policy = SKIP_POLICY
+    replays_dir: Optional[str] = None
+    # Seconds a tick waits for guards planned in another process, None plans them
+    # inline
+    guards_planning_deadline: Optional[float] = None
+
+    def __init__(self, loop, game_board: GameBoard, tick_timer=None):
         self.loop = loop
+        self.recorder: Optional[ReplayRecorder] = None
+        # Timed guards plans depend on planning time, replays wouldn't repeat them
+        if self.replays_dir and self.guards_planning_deadline is None:
+            self.recorder = get_replay_recorder(
+                self.replays_dir, game_board.board_layers, game_board.random_seed
+            )
         self._board: GameBoard = game_board
         self._registry: Dict[UUID, Union[Player, Guard]] = {}
-        self._drill_scenarios: Dict[UUID, Dict[Tuple, List]] = {}
+        self._drill_pits = DrillPits()
         self._die_cells: List[Tuple] = []
         self._is_paused: bool = False
         self._is_running: bool = False
-        self._tick_time: float = TICK_TIME
+        self._tick_scheduler = TickScheduler(
+            tick_timer or loop, self._tick, TICK_TIME, self.tick_overrun_policy
+        )
         self._session_timespan: int = DEFAULT_SESSION_TIMESPAN
         self._start_time = None
         self._clients_info = None
         self._send_admin_info_func: Optional[Callable] = None
+        self._tick_number: int = 0
+        # Delta clients which have already received a keyframe
+        self._delta_client_ids: Set[UUID] = set()
+        # Last scoreboard message sent to each binary client
+        self._binary_clients_players: Dict[UUID, bytes] = {}
+        self._frame_encoder = BoardFrameEncoder()
+        # Last action received from each participant since the previous tick
+        self._pending_actions: Dict[UUID, str] = {}
+        self._guards_planner: Optional[GuardsPlanner] = None
+        if self.guards_planning_deadline is not None:
+            self._guards_planner = GuardsPlanner(self.guards_planning_deadline)
 
     def init(self, clients_info: Dict[UUID, Any], send_admin_info_func: Callable):
         self._clients_info = clients_info
@@ -79,21 +127,69 @@ class LodeRunnerGameSession:
 
     def broadcast(self, client_types=(SPECTATOR, PLAYER, GUARD)):
         logger.debug("Broadcasting data for websocket clients ...")
+        snapshot = self.get_session_snapshot()
+        is_keyframe_tick = self._tick_number % DELTA_KEYFRAME_INTERVAL == 0
         if self._clients_info:
             for client_id, client in self._clients_info.items():
-                if client.client_info["client_type"] in client_types:
-                    client.sendMessage(
-                        json.dumps(self.get_session_info(client_id)).encode()
+                client_info = client.client_info
+                broadcast_format = client_info["format"]
+                client_type = client_info["client_type"]
+                if client_type not in client_types:
+                    self._delta_client_ids.discard(client_id)
+                    continue
+                hero_info = self.get_hero_info(client_id)
+                if broadcast_format == BINARY_FORMAT:
+                    self._send_binary_frame(
+                        client_id, client, client_type, snapshot, hero_info
+                    )
+                elif (
+                    broadcast_format == DELTA_FORMAT
+                    and not is_keyframe_tick
+                    and client_id in self._delta_client_ids
+                ):
+                    send_message(
+                        client, client_type, snapshot.get_diff_message(hero_info)
                     )
+                else:
+                    send_message(
+                        client, client_type, snapshot.get_keyframe_message(hero_info)
+                    )
+                    if broadcast_format == DELTA_FORMAT:
+                        self._delta_client_ids.add(client_id)
         self._send_admin_info_func()
 
+    def _send_binary_frame(self, client_id, client, client_type, snapshot, hero_info):
+        players_message = snapshot.get_players_message()
+        if self._binary_clients_players.get(client_id) != players_message:
+            send_message(client, client_type, players_message)
+            self._binary_clients_players[client_id] = players_message
+        send_message(
+            client, client_type, snapshot.get_binary_frame(hero_info), isBinary=True
+        )
+
+    def reset_client_delta(self, client_id: UUID):
+        self._delta_client_ids.discard(client_id)
+        self._binary_clients_players.pop(client_id, None)
+
+    def get_session_snapshot(self) -> SessionSnapshot:
+        return SessionSnapshot(
+            tick=self._tick_number,
+            size=self._board.size,
+            board_diff=self._board.pop_board_diff(),
+            board_bytes=self._board.get_board_bytes(),
+            players_info=self._get_players_info(),
+            frame_encoder=self._frame_encoder,
+            board_hash=self._board.board_hash,
+        )
+
     def get_admin_info(self) -> Dict[str, Any]:
         return {
             "guards": len(self.guards),
             "gold": len(self._board.gold_cells),
             "players": [player.get_name() for player in self.players],
             "size": self._board.blocks_number,
-            "tick": self._tick_time,
+            "tick": self._tick_scheduler.tick_time,
+            "tick_stats": self._tick_scheduler.get_stats(),
             "is_running": self._is_running,
             "is_paused": self._is_paused,
             "timespan": self._session_timespan,
@@ -105,7 +201,7 @@ class LodeRunnerGameSession:
         if not self._is_running:
             self._start_time = time.time()
             self._is_running = True
-            self._tick()
+            self._tick_scheduler.start()
             logger.info("Game session has been started")
 
     @admin_command_decorator
@@ -123,23 +219,42 @@ class LodeRunnerGameSession:
             self._session_timespan = int(session_timespan)
             logger.info(f"Game session timespan has been set to {session_timespan}")
 
-    def _tick(self):
+    def _tick(self, is_behind_schedule: bool = False) -> bool:
+        if self.recorder is not None:
+            self.recorder.record_tick({} if self._is_paused else self._pending_actions)
         if not self._is_paused:
-            self.cleanup_die_cells()
-            self.move_guards()
-            self.process_gravity()
-            self.process_drill_scenario()
-            self.broadcast()
-            self._send_admin_info_func()
-            shuffle(self._participants)
+            self._tick_number += 1
+            for phase in TICK_PHASES[:-1]:
+                self._run_tick_phase(phase)
+            # Ticks caught up after an overrun aren't broadcast, the next one is
+            if not is_behind_schedule:
+                self._run_tick_phase("broadcast")
+                self._send_admin_info_func()
             self.allow_participants_action()
 
         if time.time() - self._start_time < self._session_timespan and self._is_running:
-            self.loop.call_later(self._tick_time, self._tick)
-        else:
-            self._is_running = False
-            self._send_admin_info_func()
-            logger.info("Game session has been ended")
+            return True
+
+        self._is_running = False
+        self._send_admin_info_func()
+        self.close_recorder()
+        logger.info("Game session has been ended")
+        return False
+
+    def close_recorder(self):
+        # Replays cover one run of the session, later runs aren't recorded
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def close(self):
+        self._tick_scheduler.stop()
+        self.close_recorder()
+
+    def _run_tick_phase(self, phase: str):
+        start_time = time.perf_counter()
+        getattr(self, phase)()
+        TICK_PHASE_SECONDS.labels(phase).observe(time.perf_counter() - start_time)
 
     @admin_command_decorator
     def update_gold_cells(self, number: int):
@@ -154,9 +269,9 @@ class LodeRunnerGameSession:
         if not self._is_running:
             number = int(number)
             for guard_obj in self.guards:
-                self.unregister_participant(guard_obj.get_id())
+                self._unregister_participant(guard_obj.get_id())
             for idx in range(number):
-                self.register_participant(uuid4(), f"{GUARD}-{idx}", GUARD)
+                self._register_participant(uuid4(), f"{GUARD}-{idx}", GUARD)
 
     def cleanup_die_cells(self):
         while self._die_cells:
@@ -169,36 +284,40 @@ class LodeRunnerGameSession:
                 )
 
     def move_guards(self):
-        guard_player_data = []
-        for guard_obj in self.guards:
-            for player_cell in self.players_cells.values():
-                next_target_distance = get_next_target_age(
-                    self._board.global_wave_age_info,
-                    self._board.joints_info,
-                    [player_cell],
-                    guard_obj.cell,
+        guards_cells = self._get_guards_cells()
+        if self._guards_planner is None:
+            guards_moves = get_guards_moves(
+                self._board.navigator, guards_cells, self._get_players_cells()
+            )
+        else:
+            guards_moves = self._guards_planner.get_plan(guards_cells)
+            if guards_moves is None:
+                guards_moves = get_greedy_guards_moves(
+                    self._board.joints_info, guards_cells, self._get_players_cells()
                 )
-                if next_target_distance:
-                    guard_player_data.append(
-                        [guard_obj.get_id(), guard_obj.cell, next_target_distance]
-                    )
-
-        guard_player_data = sorted(guard_player_data, key=lambda x: x[2][2])
-        selected_guard_ids = []
-        selected_players_cells = []
-        for (
-                guard_id,
-                guard_cell,
-                (next_cell, target_cell, distance),
-        ) in guard_player_data:
-            if (
-                    guard_id not in selected_guard_ids
-                    and target_cell not in selected_players_cells
-            ):
-                move_action = Move.get_move_from_start_end_cells(guard_cell, next_cell)
+        for guard_id, move_action in guards_moves.items():
+            # Guards of a plan from the previous tick may be gone since
+            if self._is_participant_id_in_registry(guard_id):
                 self.process_action(move_action, guard_id)
-                selected_guard_ids.append(guard_id)
-                selected_players_cells.append(target_cell)
+
+    def plan_guards(self):
+        if self._guards_planner is not None:
+            self._guards_planner.submit(
+                self._board.get_planning_data(),
+                self._get_guards_cells(),
+                self._get_players_cells(),
+                self._drill_pits.get_cells_types(),
+            )
+
+    def _get_guards_cells(self) -> List[Tuple[UUID, Tuple]]:
+        return [(guard_obj.get_id(), guard_obj.cell) for guard_obj in self.guards]
+
+    def _get_players_cells(self) -> List[Tuple]:
+        return list(self.players_cells.values())
+
+    @property
+    def is_running(self) -> bool:
+        return self._is_running
 
     @property
     def timer(self):
@@ -207,22 +326,44 @@ class LodeRunnerGameSession:
         return self._session_timespan
 
     def register_participant(self, client_id: UUID, name: str, participant_type: str):
-        cell = choice(self._board.get_empty_cells())
+        if self.recorder is not None:
+            self.recorder.record_registration(client_id, name, participant_type)
+        self._register_participant(client_id, name, participant_type)
+
+    def _register_participant(
+        self, client_id: UUID, name: str, participant_type: str
+    ):
+        cell = self._board.get_random_empty_cell()
         if self._is_participant_id_in_registry(client_id):
             participant_object = self._get_participant_object_by_id(client_id)
-            participant_object.re_spawn(cell)
+            self._board.occupancy.re_spawn(participant_object, cell)
         else:
             participant_object = BaseParticipant.get_participant(
                 participant_type=participant_type,
                 participant_id=client_id,
                 cell=cell,
                 name=name,
+                direction=get_random_direction(self._board.random),
             )
             self._registry.update({client_id: participant_object})
             participant_object = self._get_participant_object_by_id(client_id)
+            self._board.occupancy.add(participant_object)
 
         self._update_participant_board_cell(participant_object)
 
+    def queue_action(self, action: str, participant_id: UUID):
+        if participant_id in self._registry:
+            self._pending_actions[participant_id] = action
+
+    def process_pending_actions(self):
+        if not self._pending_actions:
+            return
+        pending_actions, self._pending_actions = self._pending_actions, {}
+        for participant_id in list(self._registry):
+            action = pending_actions.get(participant_id)
+            if action is not None:
+                self.process_action(action, participant_id)
+
     def process_action(self, action: str, player_id: UUID):
         player_object = self._get_participant_object_by_id(player_id)
         if (
@@ -257,7 +398,7 @@ class LodeRunnerGameSession:
         ):
             if self._is_participant_in_cell(next_cell, PLAYER):
                 victim_player_object = self._get_participant_object_by_cell(next_cell)
-                self.register_participant(
+                self._register_participant(
                     client_id=victim_player_object.get_id(),
                     name=victim_player_object.get_name(),
                     participant_type=PLAYER,
@@ -277,12 +418,13 @@ class LodeRunnerGameSession:
                     direction=participant_object.get_direction(),
                 )
 
-            participant_object.move(next_cell)
+            self._board.occupancy.move(participant_object, next_cell)
+            current_pit = self._drill_pits.get_pit(current_cell)
             self._board.process_move(
                 current_cell=current_cell,
                 next_cell=next_cell,
                 next_cell_type=next_cell_type,
-                is_cell_in_scenarios=self._is_cell_in_scenarios(current_cell),
+                current_pit_cell_type=current_pit and current_pit.cell_type,
             )
         else:
             self._update_participant_board_cell(participant_object)
@@ -295,6 +437,9 @@ class LodeRunnerGameSession:
         if not self._board.is_cell_valid(participant_object.cell):
             return False
 
+        if not self._board.is_cell_valid(next_cell):
+            return False
+
         if (
                 move_action == Move.Up
                 and self._board.get_initial_cell_type(participant_object.cell)
@@ -320,10 +465,9 @@ class LodeRunnerGameSession:
 
         if self._board.get_initial_cell_type(
                 next_cell
-        ) == CellType.DrillableBrick and self._scenarios_info[next_cell][-1] in [
-            CellType.Drill,
-            CellType.DrillableBrick,
-        ]:
+        ) == CellType.DrillableBrick and self._drill_pits.get_next_cell_type(
+            next_cell
+        ) in [CellType.Drill, CellType.DrillableBrick]:
             return False
 
         if (
@@ -348,59 +492,33 @@ class LodeRunnerGameSession:
         drill_vector = get_drill_vector(drill_action)
         cell = get_modified_cell(player_object.cell, drill_vector)
         if self._board.is_cell_drillable(cell) and not self._is_cell_in_scenarios(cell):
-            self._add_drill_scenario(cell, player_id=player_object.get_id())
+            self._drill_pits.add_pit(cell, owner_id=player_object.get_id())
         player_object.disallow_action()
 
-    def _add_drill_scenario(self, cell: Tuple, player_id: UUID):
-        scenario = deepcopy(DRILL_SCENARIO)
-        scenario.reverse()
-        if player_id in self._drill_scenarios:
-            self._drill_scenarios[player_id].update({cell: scenario})
-        else:
-            self._drill_scenarios.update({player_id: {cell: scenario}})
-
     def process_drill_scenario(self):
         logger.debug("Processing drill scenarios ...")
-        for player_id, player_scenarios in self._drill_scenarios.items():
-            for cell, scenario in player_scenarios.items():
-                scenario_cell_type = scenario.pop()
-                if not self._is_anyone_in_cell(cell):
-                    self._board.update_board(cell, scenario_cell_type)
-                else:
-                    participant_object = self._get_participant_object_by_cell(cell)
-
-                    if len(scenario) == 1:
-                        pits_owner = self._get_player_object_by_pit_cell(cell)
-                        if pits_owner and pits_owner != participant_object:
-                            pits_owner.trap_participant(participant_object)
-                        self.register_participant(
-                            client_id=participant_object.get_id(),
-                            name=participant_object.get_name(),
-                            participant_type=participant_object.get_type(),
-                        )
-
-                        if participant_object.get_type() == PLAYER:
-                            self._board.update_board(cell, CellType.HeroDies)
-
-        self._delete_empty_scenarios()
-
-    def _get_player_object_by_pit_cell(self, cell: Tuple):
-        for player_id, player_scenarios in self._drill_scenarios.items():
-            if cell in player_scenarios:
-                return self._get_participant_object_by_id(player_id)
-
-    def _delete_empty_scenarios(self):
-        delete_empty_value_keys(self._drill_scenarios)
+        for pit in self._drill_pits.pop_changed_pits():
+            cell = pit.cell
+            self._board.update_pit_cell(cell, pit.cell_type)
+            if not self._is_anyone_in_cell(cell):
+                self._board.update_board(cell, pit.cell_type)
+            elif pit.is_filled():
+                participant_object = self._get_participant_object_by_cell(cell)
+                pits_owner = self._get_participant_object_by_id(pit.owner_id)
+                if pits_owner and pits_owner != participant_object:
+                    pits_owner.trap_participant(participant_object)
+                self._register_participant(
+                    client_id=participant_object.get_id(),
+                    name=participant_object.get_name(),
+                    participant_type=participant_object.get_type(),
+                )
 
-        for player_id, player_scenarios in self._drill_scenarios.items():
-            delete_empty_value_keys(player_scenarios)
+                if participant_object.get_type() == PLAYER:
+                    self._board.update_board(cell, CellType.HeroDies)
 
     @property
     def score_info(self):
-        return {
-            player_object.name: player_object.score["permanent"]
-            for player_object in self.players
-        }
+        return get_score_info(self.players)
 
     @property
     def players(self) -> List[Player]:
@@ -412,8 +530,13 @@ class LodeRunnerGameSession:
 
     @property
     def players_cells(self):
+        return get_players_cells(self.players)
+
+    def _get_players_info(self) -> Dict[str, Dict]:
+        players = self.players
         return {
-            player_object.name: player_object.cell for player_object in self.players
+            "score": get_score_info(players),
+            "names": get_players_cells(players),
         }
 
     @property
@@ -445,16 +568,32 @@ class LodeRunnerGameSession:
             return participant_object.get_direction()
 
     def get_session_info(self, player_id: Optional[UUID] = None) -> Dict[str, Any]:
-        cell = self._get_participant_cell_by_id(player_id)
-        direction = self._get_participant_direction_by_id(player_id)
         return {
-            "board": self._board.get_board_layers(cell=cell, direction=direction),
-            "players": {"score": self.score_info, "names": self.players_cells},
+            "board": self._board.get_board_layers(),
+            "players": self._get_players_info(),
             "size": self._board.size,
+            "tick": self._tick_number,
+            "hero": self.get_hero_info(player_id),
+            "board_hash": self._board.board_hash,
         }
 
+    def get_navigation_data(self, board_hash: str) -> Optional[bytes]:
+        if board_hash == self._board.board_hash:
+            return self._board.get_navigation_data()
+
+    def get_hero_info(self, participant_id: Optional[UUID]) -> Optional[List]:
+        participant_object = self._registry.get(participant_id)
+        if participant_object:
+            cell = participant_object.cell
+            hero_cell_type = self._board.get_hero_cell_type(
+                cell=cell, direction=participant_object.get_direction()
+            )
+            return [cell[0], cell[1], hero_cell_type]
+
     def run_admin_command(self, func_name: str, func_args: List):
         if func_name in AdminCommands:
+            if self.recorder is not None:
+                self.recorder.record_admin_command(func_name, func_args)
             func = getattr(self, func_name)
             return func(*func_args)
         return "Command is not available"
@@ -468,7 +607,7 @@ class LodeRunnerGameSession:
         if not self._is_running:
             try:
                 new_tick_time = float(tick_time)
-                self._tick_time = new_tick_time
+                self._tick_scheduler.tick_time = new_tick_time
                 return "Tick time has been set to %s sec" % new_tick_time
             except ValueError as e:
                 return "Could't set tick time: %s" % str(e)
@@ -485,14 +624,20 @@ class LodeRunnerGameSession:
                 gold_cells_number = len(self._board.gold_cells)
                 guards_number = len(self.guards)
                 self._board.empty_gold_cells()
-                for guard_obj in self.guards:
-                    self.unregister_participant(guard_obj.get_id())
+                # Cells of the old board mean nothing on the new one, participants
+                # are unregistered before their clients are closed
+                for participant_object in self._participants:
+                    self._unregister_participant(participant_object.get_id())
                 for player in self.player_clients:
                     player.sendClose()
                 time.sleep(0.1)
-                self._board = GameBoard.from_blocks_number(int(blocks_number))
+                self._board = GameBoard.from_blocks_number(
+                    int(blocks_number), random_seed=self._board.random.getrandbits(32)
+                )
+                self._delta_client_ids.clear()
+                self._drill_pits.clear()
                 for idx in range(guards_number):
-                    self.register_participant(uuid4(), f"{GUARD}-{idx}", GUARD)
+                    self._register_participant(uuid4(), f"{GUARD}-{idx}", GUARD)
                 self._board.init_gold_cells(gold_cells_number)
 
     @property
@@ -508,9 +653,19 @@ class LodeRunnerGameSession:
         self._board.update_board(cell=participant_obj.cell, cell_type=player_cell_type)
 
     def unregister_participant(self, participant_id):
+        if self.recorder is not None:
+            self.recorder.record_unregistration(participant_id)
+        self._unregister_participant(participant_id)
+
+    def _unregister_participant(self, participant_id):
+        # Players of a regenerated board are gone before their clients close
+        if not self._is_participant_id_in_registry(participant_id):
+            return
         participant_cell = self._get_participant_cell_by_id(participant_id)
         self._board.restore_original_cell(participant_cell)
         participant_obj = self._registry.pop(participant_id)
+        self._pending_actions.pop(participant_id, None)
+        self._board.occupancy.remove(participant_obj)
         logger.info(
             "Unregistered {participant_type} '{name}', id: {id}".format(
                 participant_type=participant_obj.get_type(),
@@ -530,35 +685,16 @@ class LodeRunnerGameSession:
         return ""
 
     def _is_participant_in_cell(self, cell, participant_type):
-        return cell in [
-            participant_object.cell
-            for participant_object in self._participants
-            if participant_object.get_type() == participant_type
-        ]
+        return self._board.occupancy.is_occupied_by(cell, participant_type)
 
     def _is_anyone_in_cell(self, cell):
-        return cell in [
-            participant_object.cell for participant_object in self._participants
-        ]
+        return self._board.occupancy.is_occupied(cell)
 
     def _is_cell_in_scenarios(self, cell):
-        return cell in self._scenarios_info
-
-    @property
-    def _scenarios_info(self):
-        return dict(
-            chain.from_iterable(
-                [
-                    player_scenarios.items()
-                    for player_scenarios in self._drill_scenarios.values()
-                ]
-            )
-        )
+        return cell in self._drill_pits
 
     def _get_participant_object_by_cell(self, cell) -> BaseParticipant:
-        for participant_object in self._participants:
-            if participant_object.cell == cell:
-                return participant_object
+        return self._board.occupancy.get_participant(cell)
 
     def _is_participant_id_in_registry(self, participant_id):
         return participant_id in self._registry
@@ -573,6 +709,23 @@ class LodeRunnerGameSession:
                 return participant_object.get_id()
 
 
+def send_message(client, client_type: str, payload: bytes, isBinary: bool = False):
+    client.sendMessage(payload, isBinary=isBinary)
+    SENT_MESSAGES.labels(client_type).inc()
+    SENT_BYTES.labels(client_type).inc(len(payload))
+
+
+def get_score_info(players: List[Player]) -> Dict[str, int]:
+    return {
+        player_object.name: player_object.score["permanent"]
+        for player_object in players
+    }
+
+
+def get_players_cells(players: List[Player]) -> Dict[str, Tuple]:
+    return {player_object.name: player_object.cell for player_object in players}
+
+
 def get_drill_vector(drill_action):
     if drill_action == Drill.DrillLeft:
         return -1, 1
@@ -580,16 +733,6 @@ def get_drill_vector(drill_action):
         return 1, 1
 
 
-def delete_empty_value_keys(info):
-    empty_value_keys = []
-    for key, value in info.items():
-        if not value:
-            empty_value_keys.append(key)
-
-    for elem in empty_value_keys:
-        info.pop(elem)
-
-
 def get_move_point_cell(cell, move):
     x_move, y_move = get_move_changes(move)
     return cell[0] + x_move, cell[1] + y_move
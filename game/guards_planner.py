@@ -0,0 +1,197 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from logging import getLogger
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from common.navigation import (
+    UNREACHABLE,
+    NavigationBoard,
+    get_joints_info_from_masks,
+)
+from common.utils import CellType, Move
+from game.game_board import get_navigator
+from utils.metrics import Counter
+
+logger = getLogger()
+
+PLANNING_PROCESSES_NUMBER = 2
+# Navigation boards kept by each planning process, one per board hash
+MAX_PLANNING_BOARDS_NUMBER = 8
+
+LATE_GUARDS_PLANS = Counter(
+    "lode_runner_late_guards_plans_total", "Guards plans not ready by the deadline"
+)
+
+_planning_executor: Optional[ProcessPoolExecutor] = None
+# Navigation boards of a planning process with pit cell types applied to them
+_planning_boards: OrderedDict = OrderedDict()
+
+
+def get_planning_executor() -> ProcessPoolExecutor:
+    # Shared by game rooms of the process, processes are started on first use
+    global _planning_executor
+    if _planning_executor is None:
+        _planning_executor = ProcessPoolExecutor(PLANNING_PROCESSES_NUMBER)
+    return _planning_executor
+
+
+class GuardsPlanner:
+    # Guard moves are planned in another process from positions at the end of a
+    # tick, so planning doesn't take the GIL from the broadcast. The next tick
+    # waits for them up to the deadline, if they are late guards take a greedy
+    # step and the late plan is dropped
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self._future: Optional[Future] = None
+        self._late_future: Optional[Future] = None
+
+    def submit(
+        self,
+        planning_data: Tuple,
+        guards_cells: List[Tuple[UUID, Tuple]],
+        players_cells: List[Tuple],
+        pits_cells_types: Dict[Tuple, str],
+    ):
+        if self._late_future is not None:
+            if not self._late_future.done():
+                return
+            self._late_future = None
+        self._future = get_planning_executor().submit(
+            plan_guards_moves,
+            planning_data,
+            guards_cells,
+            players_cells,
+            pits_cells_types,
+        )
+
+    def get_plan(
+        self, guards_cells: List[Tuple[UUID, Tuple]]
+    ) -> Optional[Dict[UUID, str]]:
+        if self._future is None:
+            return None
+        future, self._future = self._future, None
+        try:
+            guards_plan = future.result(timeout=self.deadline)
+        except TimeoutError:
+            self._late_future = future
+            LATE_GUARDS_PLANS.labels().inc()
+            logger.warning(f"Guards plan is late for {self.deadline:.3f} sec")
+            return None
+        # Moves are planned from the cells guards had, moved guards get none
+        guards_cells = dict(guards_cells)
+        return {
+            guard_id: move_action
+            for guard_id, (guard_cell, move_action) in guards_plan.items()
+            if guards_cells.get(guard_id) == guard_cell
+        }
+
+
+def plan_guards_moves(
+    planning_data: Tuple,
+    guards_cells: List[Tuple[UUID, Tuple]],
+    players_cells: List[Tuple],
+    pits_cells_types: Dict[Tuple, str],
+) -> Dict[UUID, Tuple[Tuple, str]]:
+    # Runs in a planning process, the navigation of a board is built once and
+    # follows pits of the snapshots
+    navigation_board, previous_pits_cells_types = get_planning_board(planning_data)
+    for cell in previous_pits_cells_types.keys() - pits_cells_types.keys():
+        navigation_board.update_pit_cell(cell, CellType.DrillableBrick)
+    for cell, cell_type in pits_cells_types.items():
+        navigation_board.update_pit_cell(cell, cell_type)
+    _planning_boards[planning_data[0]] = (navigation_board, pits_cells_types)
+    guards_moves = get_guards_moves(
+        navigation_board.navigator, guards_cells, players_cells
+    )
+    guards_cells = dict(guards_cells)
+    return {
+        guard_id: (guards_cells[guard_id], move_action)
+        for guard_id, move_action in guards_moves.items()
+    }
+
+
+def get_planning_board(planning_data: Tuple) -> Tuple[NavigationBoard, Dict]:
+    (
+        board_hash,
+        size,
+        board,
+        joints_masks,
+        memory_limit,
+        hierarchical_navigation_min_blocks,
+    ) = planning_data
+    planning_board = _planning_boards.get(board_hash)
+    if planning_board is not None:
+        _planning_boards.move_to_end(board_hash)
+        return planning_board
+    joints_info = get_joints_info_from_masks(joints_masks, size)
+    navigator = get_navigator(
+        joints_info, size, memory_limit, hierarchical_navigation_min_blocks
+    )
+    planning_board = NavigationBoard(board, size, joints_info, navigator), {}
+    _planning_boards[board_hash] = planning_board
+    if len(_planning_boards) > MAX_PLANNING_BOARDS_NUMBER:
+        _planning_boards.popitem(last=False)
+    return planning_board
+
+
+def get_guards_moves(
+    navigator,
+    guards_cells: List[Tuple[UUID, Tuple]],
+    players_cells: List[Tuple],
+) -> Dict[UUID, str]:
+    guards_moves = {}
+    # One reverse BFS flow field per player, each guard reads its distance in O(1)
+    players_fields = [
+        (player_cell, navigator.get_field(player_cell))
+        for player_cell in players_cells
+    ]
+    guard_player_data = []
+    for guard_id, guard_cell in guards_cells:
+        guard_cell_index = navigator.get_cell_index(guard_cell)
+        for player_cell, field in players_fields:
+            distance = field[guard_cell_index]
+            if distance not in (0, UNREACHABLE):
+                guard_player_data.append((distance, guard_id, guard_cell, player_cell))
+
+    guard_player_data.sort(key=lambda x: x[0])
+    selected_players_cells = set()
+    for distance, guard_id, guard_cell, player_cell in guard_player_data:
+        if guard_id not in guards_moves and player_cell not in selected_players_cells:
+            next_cell = navigator.get_next_cell(guard_cell, player_cell)
+            guards_moves[guard_id] = Move.get_move_from_start_end_cells(
+                guard_cell, next_cell
+            )
+            selected_players_cells.add(player_cell)
+    return guards_moves
+
+
+def get_greedy_guards_moves(
+    joints_info: Dict[Tuple[int, int], List],
+    guards_cells: List[Tuple[UUID, Tuple]],
+    players_cells: List[Tuple],
+) -> Dict[UUID, str]:
+    # Without a plan each guard steps to the joint closest to the nearest player
+    guards_moves = {}
+    if not players_cells:
+        return guards_moves
+    for guard_id, guard_cell in guards_cells:
+        player_cell = min(
+            players_cells, key=lambda cell: get_manhattan_distance(guard_cell, cell)
+        )
+        next_cell = min(
+            joints_info.get(guard_cell, []),
+            key=lambda cell: get_manhattan_distance(cell, player_cell),
+            default=None,
+        )
+        if next_cell is not None and get_manhattan_distance(
+            next_cell, player_cell
+        ) < get_manhattan_distance(guard_cell, player_cell):
+            guards_moves[guard_id] = Move.get_move_from_start_end_cells(
+                guard_cell, next_cell
+            )
+    return guards_moves
+
+
+def get_manhattan_distance(cell: Tuple[int, int], other_cell: Tuple[int, int]) -> int:
+    return abs(cell[0] - other_cell[0]) + abs(cell[1] - other_cell[1])
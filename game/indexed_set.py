@@ -0,0 +1,47 @@
+import random
+from typing import Dict, Hashable, Iterable, List
+
+
+class IndexedSet:
+    # Items list for O(1) random choice, positions for O(1) membership and removal
+    def __init__(self, items: Iterable[Hashable] = ()):
+        self._items: List[Hashable] = []
+        self._positions: Dict[Hashable, int] = {}
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item) -> bool:
+        return item in self._positions
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def add(self, item: Hashable):
+        if item not in self._positions:
+            self._positions[item] = len(self._items)
+            self._items.append(item)
+
+    def discard(self, item: Hashable):
+        position = self._positions.pop(item, None)
+        if position is None:
+            return
+        last_item = self._items.pop()
+        if position < len(self._items):
+            self._items[position] = last_item
+            self._positions[last_item] = position
+
+    def remove(self, item: Hashable):
+        if item not in self._positions:
+            raise KeyError(item)
+        self.discard(item)
+
+    def pop(self) -> Hashable:
+        item = self._items[-1]
+        self.discard(item)
+        return item
+
+    def get_random_item(self, rng=random) -> Hashable:
+        return rng.choice(self._items)
@@ -0,0 +1,158 @@
+import json
+import struct
+from itertools import count
+from os import makedirs
+from os.path import join
+from time import strftime
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+from uuid import UUID
+
+from common.utils import PLAYER, GUARD, Drill, Move
+
+REPLAY_FILE_EXTENSION = ".replay"
+REPLAY_MAGIC = b"LRRP"
+REPLAY_VERSION = 1
+# magic, version, random seed, board size
+REPLAY_HEADER = struct.Struct("!4sBIH")
+EVENT_TYPE = struct.Struct("!B")
+PARTICIPANT = struct.Struct("!H")
+ACTION = struct.Struct("!HB")
+LENGTH = struct.Struct("!H")
+
+REGISTER_EVENT = 1
+UNREGISTER_EVENT = 2
+ADMIN_COMMAND_EVENT = 3
+TICK_EVENT = 4
+
+PARTICIPANT_TYPES = [PLAYER, GUARD]
+ACTIONS = Move.get_valid_codes() + Drill.get_valid_codes()
+ACTIONS_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+
+class ReplayError(Exception):
+    pass
+
+
+class ReplayRecorder:
+    # Writes session inputs: registrations, admin commands and actions of each tick.
+    # With the seed and the board they are enough to replay the session exactly
+    def __init__(
+        self, replay_file: BinaryIO, board_layers: List[str], random_seed: int
+    ):
+        self._file = replay_file
+        self._participants_indexes: Dict[UUID, int] = {}
+        self._participants_counter = count()
+        self._file.write(
+            REPLAY_HEADER.pack(
+                REPLAY_MAGIC, REPLAY_VERSION, random_seed, len(board_layers)
+            )
+        )
+        self._file.write("".join(board_layers).encode())
+
+    def record_registration(self, participant_id: UUID, name: str, participant_type):
+        if participant_id in self._participants_indexes:
+            return
+        participant_index = next(self._participants_counter)
+        self._participants_indexes[participant_id] = participant_index
+        self._file.write(EVENT_TYPE.pack(REGISTER_EVENT))
+        self._file.write(PARTICIPANT.pack(participant_index))
+        self._file.write(EVENT_TYPE.pack(PARTICIPANT_TYPES.index(participant_type)))
+        self._write_string(name)
+
+    def record_unregistration(self, participant_id: UUID):
+        participant_index = self._participants_indexes.pop(participant_id, None)
+        if participant_index is not None:
+            self._file.write(EVENT_TYPE.pack(UNREGISTER_EVENT))
+            self._file.write(PARTICIPANT.pack(participant_index))
+
+    def record_admin_command(self, func_name: str, func_args: List):
+        self._file.write(EVENT_TYPE.pack(ADMIN_COMMAND_EVENT))
+        self._write_string(func_name)
+        self._write_string(json.dumps(func_args))
+
+    def record_tick(self, actions: Dict[UUID, str]):
+        tick_actions = [
+            (self._participants_indexes[participant_id], ACTIONS_CODES[action])
+            for participant_id, action in actions.items()
+            if participant_id in self._participants_indexes and action in ACTIONS_CODES
+        ]
+        self._file.write(EVENT_TYPE.pack(TICK_EVENT))
+        self._file.write(LENGTH.pack(len(tick_actions)))
+        for tick_action in tick_actions:
+            self._file.write(ACTION.pack(*tick_action))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def _write_string(self, value: str):
+        encoded_value = value.encode()
+        self._file.write(LENGTH.pack(len(encoded_value)))
+        self._file.write(encoded_value)
+
+
+def get_replay_recorder(
+    replays_dir: str, board_layers: List[str], random_seed: int
+) -> ReplayRecorder:
+    makedirs(replays_dir, exist_ok=True)
+    file_name = f"{strftime('%Y%m%d-%H%M%S')}-{random_seed:08x}{REPLAY_FILE_EXTENSION}"
+    replay_file = open(join(replays_dir, file_name), "wb")
+    return ReplayRecorder(replay_file, board_layers, random_seed)
+
+
+def read_replay_header(replay_file: BinaryIO) -> Tuple[int, List[str]]:
+    magic, version, random_seed, size = REPLAY_HEADER.unpack(
+        read_exactly(replay_file, REPLAY_HEADER.size)
+    )
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ReplayError(f"Unsupported replay format {magic} version {version}")
+    board = read_exactly(replay_file, size * size).decode()
+    board_layers = [board[line * size : (line + 1) * size] for line in range(size)]
+    return random_seed, board_layers
+
+
+def read_replay_events(replay_file: BinaryIO) -> Iterator[Tuple]:
+    while True:
+        event_type_data = replay_file.read(EVENT_TYPE.size)
+        if not event_type_data:
+            return
+        (event_type,) = EVENT_TYPE.unpack(event_type_data)
+        if event_type == REGISTER_EVENT:
+            (participant_index,) = read_struct(replay_file, PARTICIPANT)
+            (participant_type_index,) = read_struct(replay_file, EVENT_TYPE)
+            yield (
+                event_type,
+                participant_index,
+                PARTICIPANT_TYPES[participant_type_index],
+                read_string(replay_file),
+            )
+        elif event_type == UNREGISTER_EVENT:
+            yield event_type, read_struct(replay_file, PARTICIPANT)[0]
+        elif event_type == ADMIN_COMMAND_EVENT:
+            func_name = read_string(replay_file)
+            yield event_type, func_name, json.loads(read_string(replay_file))
+        elif event_type == TICK_EVENT:
+            (actions_number,) = read_struct(replay_file, LENGTH)
+            actions = []
+            for _ in range(actions_number):
+                participant_index, action_code = read_struct(replay_file, ACTION)
+                actions.append((participant_index, ACTIONS[action_code]))
+            yield event_type, actions
+        else:
+            raise ReplayError(f"Unknown replay event type {event_type}")
+
+
+def read_struct(replay_file: BinaryIO, struct_format: struct.Struct) -> Tuple:
+    return struct_format.unpack(read_exactly(replay_file, struct_format.size))
+
+
+def read_string(replay_file: BinaryIO) -> str:
+    (length,) = read_struct(replay_file, LENGTH)
+    return read_exactly(replay_file, length).decode()
+
+
+def read_exactly(replay_file: BinaryIO, size: int) -> bytes:
+    data = replay_file.read(size)
+    if len(data) != size:
+        raise ReplayError("Replay is truncated")
+    return data
@@ -0,0 +1,78 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from common.board_frame import BoardFrameEncoder, get_board_layers_from_bytes
+
+
+class SessionSnapshot:
+    def __init__(
+        self,
+        tick: int,
+        size: int,
+        board_diff: Dict[int, str],
+        board_bytes: bytes,
+        players_info: Dict[str, Any],
+        frame_encoder: BoardFrameEncoder,
+        board_hash: str,
+    ):
+        self.tick = tick
+        self.size = size
+        self.board_hash = board_hash
+        self._board_diff = board_diff
+        self._board_bytes = board_bytes
+        self._players_info = players_info
+        self._frame_encoder = frame_encoder
+        self._players_message: Optional[bytes] = None
+        # Encoded once per tick without the closing brace, clients append hero patch
+        self._keyframe_prefix: Optional[bytes] = None
+        self._diff_prefix: Optional[bytes] = None
+
+    def get_keyframe_message(self, hero_info: Optional[List] = None) -> bytes:
+        if self._keyframe_prefix is None:
+            board_layers = get_board_layers_from_bytes(self._board_bytes, self.size)
+            self._keyframe_prefix = self._get_message_prefix(
+                "board", board_layers, board_hash=self.board_hash
+            )
+        return self._keyframe_prefix + get_hero_patch(hero_info)
+
+    def get_diff_message(self, hero_info: Optional[List] = None) -> bytes:
+        if self._diff_prefix is None:
+            self._diff_prefix = self._get_message_prefix("diff", self._board_diff)
+        return self._diff_prefix + get_hero_patch(hero_info)
+
+    def get_binary_frame(self, hero_info: Optional[List] = None) -> bytes:
+        if self._frame_encoder.owner is not self:
+            self._frame_encoder.set_board(
+                owner=self,
+                size=self.size,
+                tick=self.tick,
+                board_bytes=self._board_bytes,
+            )
+        return self._frame_encoder.get_frame(hero_info)
+
+    def get_players_message(self) -> bytes:
+        if self._players_message is None:
+            self._players_message = json.dumps(
+                {
+                    "players": self._players_info,
+                    "size": self.size,
+                    "board_hash": self.board_hash,
+                }
+            ).encode()
+        return self._players_message
+
+    def _get_message_prefix(self, board_key: str, board_value: Any, **extra) -> bytes:
+        message = json.dumps(
+            {
+                board_key: board_value,
+                "players": self._players_info,
+                "size": self.size,
+                "tick": self.tick,
+                **extra,
+            }
+        )
+        return message[:-1].encode()
+
+
+def get_hero_patch(hero_info: Optional[List]) -> bytes:
+    return (', "hero": %s}' % json.dumps(hero_info)).encode()
@@ -0,0 +1,147 @@
+from collections import deque
+from heapq import heappop, heappush
+from itertools import count
+from logging import getLogger
+from typing import Any, Callable, Dict, List, Tuple
+
+from common.utils import get_milliseconds
+
+logger = getLogger()
+
+SKIP_POLICY = "skip"
+CATCH_UP_POLICY = "catch_up"
+TICK_OVERRUN_POLICIES = (SKIP_POLICY, CATCH_UP_POLICY)
+MAX_CATCH_UP_TICKS = 5
+TICK_STATS_WINDOW = 100
+
+
+class TickScheduler:
+    def __init__(
+        self,
+        timer,
+        tick_func: Callable[[bool], bool],
+        tick_time: float,
+        overrun_policy: str = SKIP_POLICY,
+    ):
+        # Event loop or SharedTickScheduler, anything with time() and call_at()
+        self.timer = timer
+        self.tick_time = tick_time
+        self.overrun_policy = overrun_policy
+        # Called with True when the tick is already behind schedule,
+        # returns False when ticking should stop
+        self._tick_func = tick_func
+        self._deadline = None
+        self._handle = None
+        self._durations = deque(maxlen=TICK_STATS_WINDOW)
+        self._latenesses = deque(maxlen=TICK_STATS_WINDOW)
+        self.overruns_number = 0
+        self.skipped_ticks_number = 0
+
+    def start(self):
+        self.stop()
+        self._deadline = self.timer.time()
+        self._handle = self.timer.call_at(self._deadline, self._run)
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _run(self):
+        self._handle = None
+        start_time = self.timer.time()
+        self._latenesses.append(start_time - self._deadline)
+        # Deadlines are absolute, so processing time doesn't shift the next ticks
+        is_behind_schedule = (
+            self.overrun_policy == CATCH_UP_POLICY
+            and start_time >= self._deadline + self.tick_time
+        )
+        is_continued = self._tick_func(is_behind_schedule)
+        end_time = self.timer.time()
+        duration = end_time - start_time
+        self._durations.append(duration)
+        if duration > self.tick_time:
+            self.overruns_number += 1
+        if not is_continued:
+            return
+
+        self._deadline += self.tick_time
+        lag = end_time - self._deadline
+        if lag > 0 and (
+            self.overrun_policy == SKIP_POLICY
+            or lag > MAX_CATCH_UP_TICKS * self.tick_time
+        ):
+            skipped_ticks_number = int(lag // self.tick_time) + 1
+            self.skipped_ticks_number += skipped_ticks_number
+            self._deadline += skipped_ticks_number * self.tick_time
+            logger.warning(
+                f"Tick took {duration:.3f} sec, skipped {skipped_ticks_number} ticks"
+            )
+        self._handle = self.timer.call_at(self._deadline, self._run)
+
+    def get_stats(self) -> Dict[str, Any]:
+        durations = self._durations or [0]
+        latenesses = self._latenesses or [0]
+        return {
+            "duration": get_milliseconds(sum(durations) / len(durations)),
+            "max_duration": get_milliseconds(max(durations)),
+            "jitter": get_milliseconds(sum(latenesses) / len(latenesses)),
+            "max_jitter": get_milliseconds(max(latenesses)),
+            "overruns": self.overruns_number,
+            "skipped": self.skipped_ticks_number,
+        }
+
+
+class ScheduledTick:
+    __slots__ = ("callback", "is_cancelled")
+
+    def __init__(self, callback: Callable):
+        self.callback = callback
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+
+class SharedTickScheduler:
+    # One loop timer for ticks of all game rooms. Due ticks run in deadline order
+    # and every room ticks at most once per round, so late rooms can't starve others
+    def __init__(self, loop):
+        self.loop = loop
+        self._heap: List[Tuple[float, int, ScheduledTick]] = []
+        self._sequence = count()
+        self._handle = None
+        self._wakeup_time = None
+
+    def time(self) -> float:
+        return self.loop.time()
+
+    def call_at(self, when: float, callback: Callable) -> ScheduledTick:
+        scheduled_tick = ScheduledTick(callback)
+        heappush(self._heap, (when, next(self._sequence), scheduled_tick))
+        self._set_wakeup()
+        return scheduled_tick
+
+    def _set_wakeup(self):
+        while self._heap and self._heap[0][2].is_cancelled:
+            heappop(self._heap)
+        if not self._heap:
+            return
+        when = self._heap[0][0]
+        if self._handle is not None:
+            if self._wakeup_time <= when:
+                return
+            self._handle.cancel()
+        self._wakeup_time = when
+        self._handle = self.loop.call_at(when, self._run)
+
+    def _run(self):
+        self._handle = None
+        now = self.loop.time()
+        due_ticks = []
+        while self._heap and self._heap[0][0] <= now:
+            due_ticks.append(heappop(self._heap)[2])
+        for scheduled_tick in due_ticks:
+            if not scheduled_tick.is_cancelled:
+                scheduled_tick.callback()
+        self._set_wakeup()
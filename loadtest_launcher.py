@@ -0,0 +1,104 @@
+import asyncio
+import json
+from argparse import ArgumentParser
+from logging import getLogger
+
+from client.swarm import Swarm, SwarmStats
+from common.utils import (
+    PLAYER,
+    SPECTATOR,
+    BROADCAST_FORMATS,
+    DELTA_FORMAT,
+    DEFAULT_ROOM,
+)
+from game.game_session import TICK_TIME
+from utils.configure_logging import setup_logging
+
+logger = getLogger()
+
+DEFAULT_CONNECT_RATE = 200
+
+
+def main():
+    cmd_args = get_cmd_args()
+    setup_logging(cmd_args.log_level)
+    loop = asyncio.get_event_loop()
+    stats = SwarmStats(cmd_args.tick_time)
+    swarm = Swarm(
+        loop,
+        cmd_args.host,
+        cmd_args.port,
+        stats,
+        broadcast_format=cmd_args.broadcast_format,
+        room=cmd_args.room,
+    )
+    try:
+        loop.run_until_complete(run_load_test(swarm, cmd_args))
+    except KeyboardInterrupt:
+        logger.info("Load test has been interrupted")
+    finally:
+        swarm.close()
+        print(json.dumps(stats.get_report(), indent=2))
+
+
+async def run_load_test(swarm: Swarm, cmd_args):
+    await swarm.connect(SPECTATOR, cmd_args.spectators_number, cmd_args.connect_rate)
+    await swarm.connect(PLAYER, cmd_args.players_number, cmd_args.connect_rate)
+    logger.info(f"Connected {len(swarm.factories)} clients")
+    for _ in range(int(cmd_args.duration // cmd_args.report_interval)):
+        await asyncio.sleep(cmd_args.report_interval)
+        logger.info(f"Load test stats: {swarm.stats.get_report()}")
+
+
+def get_cmd_args():
+    parser = ArgumentParser(description="Swarm of bot clients for load testing")
+    parser.add_argument("--host", dest="host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", dest="port", type=int, default=9000)
+    parser.add_argument("--players", dest="players_number", type=int, default=100)
+    parser.add_argument(
+        "--spectators", dest="spectators_number", type=int, default=100
+    )
+    parser.add_argument(
+        "--format",
+        dest="broadcast_format",
+        choices=BROADCAST_FORMATS,
+        default=DELTA_FORMAT,
+    )
+    parser.add_argument("--room", dest="room", default=DEFAULT_ROOM)
+    parser.add_argument(
+        "-d",
+        "--duration",
+        dest="duration",
+        type=float,
+        default=60,
+        help="Seconds to run after all clients are connected",
+    )
+    parser.add_argument(
+        "--connect_rate",
+        dest="connect_rate",
+        type=float,
+        default=DEFAULT_CONNECT_RATE,
+        help="New connections per second",
+    )
+    parser.add_argument(
+        "--report_interval", dest="report_interval", type=float, default=10
+    )
+    parser.add_argument(
+        "--tick_time",
+        dest="tick_time",
+        type=float,
+        default=TICK_TIME,
+        help="Tick time of the server, used for tick lag",
+    )
+    parser.add_argument(
+        "-l",
+        "--log_level",
+        dest="log_level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
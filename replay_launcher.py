@@ -0,0 +1,55 @@
+from argparse import ArgumentParser
+from cProfile import Profile
+from logging import getLogger
+
+from common.utils import BROADCAST_FORMATS, JSON_FORMAT
+from simulation.replay_session import ReplaySession
+from utils.configure_logging import setup_logging
+
+logger = getLogger()
+
+
+def main():
+    cmd_args = get_cmd_args()
+    setup_logging(cmd_args.log_level)
+    with open(cmd_args.replay_file, "rb") as replay_file:
+        replay_session = ReplaySession(replay_file, cmd_args.broadcast_format)
+        profile = Profile() if cmd_args.profile else None
+        if profile is not None:
+            profile.enable()
+        ticks_duration = replay_session.run()
+        if profile is not None:
+            profile.disable()
+            profile.dump_stats(cmd_args.profile)
+
+    ticks_number = replay_session.ticks_number
+    print(f"Ticks: {ticks_number}, ticks duration: {ticks_duration:.3f} sec")
+    if ticks_duration:
+        print(f"Ticks per second: {ticks_number / ticks_duration:.1f}")
+    print(f"Score: {replay_session.session.score_info}")
+
+
+def get_cmd_args():
+    parser = ArgumentParser(description="Replay of a recorded game session")
+    parser.add_argument("replay_file")
+    parser.add_argument(
+        "--format",
+        dest="broadcast_format",
+        choices=BROADCAST_FORMATS,
+        default=JSON_FORMAT,
+    )
+    parser.add_argument(
+        "--profile", dest="profile", help="Save cProfile stats of the replay to file"
+    )
+    parser.add_argument(
+        "-l",
+        "--log_level",
+        dest="log_level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="WARNING",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
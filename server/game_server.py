@@ -1,39 +1,139 @@
 import json
 from autobahn.asyncio import WebSocketServerProtocol
 from autobahn.asyncio.websocket import WebSocketServerFactory
-from datetime import datetime
 from functools import wraps
 from logging import getLogger
 import time
+from typing import Callable, Dict, Optional
 from uuid import uuid1
 
-from common.utils import PLAYER, GUARD, SPECTATOR, ADMIN
+from common.utils import (
+    PLAYER,
+    GUARD,
+    SPECTATOR,
+    ADMIN,
+    JSON_FORMAT,
+    BROADCAST_FORMATS,
+    DEFAULT_ROOM,
+    MAX_ROOM_NAME_LENGTH,
+    ClientCommand,
+)
 from game.game_session import LodeRunnerGameSession
+from utils.metrics import Gauge, Histogram
 
 logger = getLogger()
 
+MAX_ROOMS_NUMBER = 64
+
+ROOM_ACTION_SECONDS = Histogram(
+    "lode_runner_room_action_seconds", "Duration of client actions", ["action"]
+)
+CONNECTED_CLIENTS = Gauge(
+    "lode_runner_connected_clients", "Connected clients", ["client_type"]
+)
+
+
+def room_action_decorator(func):
+    action_seconds = ROOM_ACTION_SECONDS.labels(func.__name__)
 
-def factory_action_decorator(func):
     @wraps(func)
-    def wrapper(factory, *args, **kwargs):
-        start_time = datetime.now()
-        func(factory, *args, **kwargs)
-        execution_time = datetime.now() - start_time
-        logger.debug("%s execution time: %s" % (func.__name__, execution_time))
+    def wrapper(room, *args, **kwargs):
+        start_time = time.perf_counter()
+        func(room, *args, **kwargs)
+        execution_time = time.perf_counter() - start_time
+        action_seconds.observe(execution_time)
+        logger.debug("%s execution time: %s", func.__name__, execution_time)
 
     return wrapper
 
 
 class BroadcastServerFactory(WebSocketServerFactory):
-    def __init__(self, url, game_session: LodeRunnerGameSession):
+    max_rooms_number = MAX_ROOMS_NUMBER
+
+    def __init__(
+        self, url, game_session_factory: Callable[[], LodeRunnerGameSession]
+    ):
         super().__init__(url)
+        self._game_session_factory = game_session_factory
+        # Rooms are created by their first client or admin command, workers of
+        # multi-process mode only build rooms routed to them
+        self.rooms: Dict[str, GameRoom] = {}
+        logger.info("Lode Runner game server has been initialized")
+
+    def get_room(self, room_name: str) -> Optional["GameRoom"]:
+        room = self.rooms.get(room_name)
+        if room is None and len(self.rooms) < self.max_rooms_number:
+            room = GameRoom(room_name, self._game_session_factory())
+            self.rooms[room_name] = room
+        return room
+
+    def register_client(self, client):
+        room = self.get_room(client.room_name)
+        if room is None:
+            logger.warning(f"Couldn't create room '{client.room_name}', limit reached")
+            client.sendClose()
+            return
+        client.room = room
+        room.register_client(client)
+
+    def unregister(self, client):
+        room = client.room
+        if room is None:
+            return
+        room.unregister(client)
+        if room.name != DEFAULT_ROOM and room.is_abandoned():
+            self.rooms.pop(room.name)
+            room.game_session.close()
+            logger.info(f"Game room '{room.name}' has been closed")
+
+    def process_message(self, client, message):
+        if client.room is not None:
+            client.room.process_message(client, message)
+
+    def run_admin_command(self, func_name, func_args, room_name=DEFAULT_ROOM):
+        if room_name == DEFAULT_ROOM:
+            room = self.get_room(room_name)
+        else:
+            room = self.rooms.get(room_name)
+        if room is None:
+            # Rooms are created by the first websocket, nobody is registered yet
+            if (
+                func_name == "check_user_name"
+                and len(self.rooms) < self.max_rooms_number
+            ):
+                return False
+            return f"Room '{room_name}' doesn't exist"
+        return room.game_session.run_admin_command(func_name, func_args)
+
+    def get_navigation_data(
+        self, board_hash: str, room_name: str = DEFAULT_ROOM
+    ) -> Optional[bytes]:
+        # The board may be played in any room, the client's room is checked first
+        room = self.rooms.get(room_name)
+        rooms = ([room] if room is not None else []) + list(self.rooms.values())
+        for room in rooms:
+            navigation_data = room.game_session.get_navigation_data(board_hash)
+            if navigation_data is not None:
+                return navigation_data
+
+
+class GameRoom:
+    def __init__(self, name: str, game_session: LodeRunnerGameSession):
+        self.name = name
         self.clients_info = {}
         self.admin_client = None
         self.game_session = game_session
         self.game_session.init(
             clients_info=self.clients_info, send_admin_info_func=self.send_admin_info
         )
-        logger.info("Lode Runner game server has been initialized")
+        logger.info(f"Game room '{name}' has been initialized")
+
+    def is_abandoned(self) -> bool:
+        return (
+            not self.clients_info
+            and self.admin_client is None
+            and not self.game_session.is_running
+        )
 
     @property
     def spectators(self):
@@ -43,7 +143,7 @@ class BroadcastServerFactory(WebSocketServerFactory):
             if value.client_info["client_type"] == SPECTATOR
         ]
 
-    @factory_action_decorator
+    @room_action_decorator
     def register_client(self, client):
         if client.client_info["client_type"] == ADMIN:
             self._register_admin_client(client)
@@ -58,6 +158,10 @@ class BroadcastServerFactory(WebSocketServerFactory):
             logger.warning("Admin client has been already registered")
             return
 
+        # An admin connected again replaces the previous one, which isn't counted
+        # after it closes
+        if self.admin_client is None:
+            CONNECTED_CLIENTS.labels(ADMIN).inc()
         self.admin_client = client
         logger.info(f"Registered Admin client {client.peer}")
         time.sleep(0.1)  # Workaround for handling race condition
@@ -77,7 +181,9 @@ class BroadcastServerFactory(WebSocketServerFactory):
 
     def _register_non_admin_client(self, client):
         client_id = uuid1()
+        client.client_id = client_id
         self.clients_info.update({client_id: client})
+        CONNECTED_CLIENTS.labels(client.client_info["client_type"]).inc()
         if self.game_session.is_player_name_in_registry(client.client_info["name"]):
             logger.error("Client with id % is already registered")
             return
@@ -99,54 +205,45 @@ class BroadcastServerFactory(WebSocketServerFactory):
                 f"Registered {client.client_info['client_type']} '{client.client_info['name']}',"
                 f" id: '{client_id}', client: '{client.peer}'"
             )
-            for client in self.spectators + self.player_clients:
-                client.sendMessage(
-                    json.dumps(self.game_session.get_session_info(client_id)).encode()
-                )
+            self.game_session.broadcast([SPECTATOR, PLAYER])
 
         if self.admin_client is not None:
             self.send_admin_info()
 
-    @factory_action_decorator
+    @room_action_decorator
     def unregister(self, client):
-        if client in self.clients_info.values():
-            client_id = self.get_client_id(client)
+        if client is self.admin_client:
+            self.admin_client = None
+            CONNECTED_CLIENTS.labels(ADMIN).dec()
+        elif self.clients_info.get(client.client_id) is client:
+            client_id = client.client_id
             logger.info("Unregistered client '{}' '{}'".format(client.peer, client_id))
             self.clients_info.pop(client_id)
+            CONNECTED_CLIENTS.labels(client.client_info["client_type"]).dec()
+            self.game_session.reset_client_delta(client_id)
             if not client.client_info["client_type"] == SPECTATOR:
                 self.game_session.unregister_participant(client_id)
-                for client in self.spectators:
-                    client.sendMessage(
-                        json.dumps(
-                            self.game_session.get_session_info(client_id)
-                        ).encode()
-                    )
+                self.game_session.broadcast([SPECTATOR])
 
                 if self.admin_client:
                     self.send_admin_info()
 
-    @factory_action_decorator
+    @room_action_decorator
     def process_message(self, client, message):
-        logger.debug(
-            "From {participant} '{name}', id: '{id}' received action '{action}'".format(
-                participant=client.client_info["client_type"],
-                action=message,
-                name=client.client_info["name"],
-                id=self.game_session.get_participant_id_by_name(
-                    client.client_info["name"]
-                ),
-            )
-        )
+        logger.debug("From '%s' received action '%s'", client.client_id, message)
 
-        self.game_session.process_action(
-            action=message, player_id=self.get_client_id(client)
-        )
+        if message == ClientCommand.Resync:
+            self.game_session.reset_client_delta(client.client_id)
+            return
 
-    def get_client_id(self, client):
-        return dict(zip(self.clients_info.values(), self.clients_info.keys()))[client]
+        # Applied at the start of the next tick, the last action wins
+        self.game_session.queue_action(action=message, participant_id=client.client_id)
 
 
 class BroadcastServerProtocol(WebSocketServerProtocol):
+    client_id = None
+    room = None
+
     def onOpen(self):
         self.factory.register_client(self)
 
@@ -157,16 +254,30 @@ class BroadcastServerProtocol(WebSocketServerProtocol):
         super(BroadcastServerProtocol, self).onClose(wasClean, code, reason)
         self.factory.unregister(self)
 
+    @property
+    def room_name(self):
+        return self.http_request_params.get("room", [DEFAULT_ROOM])[0][
+            :MAX_ROOM_NAME_LENGTH
+        ]
+
     @property
     def client_info(self):
+        broadcast_format = self.http_request_params.get("format", [JSON_FORMAT])[0]
+        if broadcast_format not in BROADCAST_FORMATS:
+            broadcast_format = JSON_FORMAT
         if ADMIN in self.http_request_params["client_type"]:
-            return {"client_type": ADMIN, "name": hash(self.http_headers["user-agent"])}
+            return {
+                "client_type": ADMIN,
+                "name": hash(self.http_headers["user-agent"]),
+                "format": JSON_FORMAT,
+            }
         if "name" in self.http_request_params:
             return {
                 "client_type": self.http_request_params["client_type"][0],
                 "name": self.http_request_params["name"][0],
+                "format": broadcast_format,
             }
-        return {"client_type": SPECTATOR, "name": ""}
+        return {"client_type": SPECTATOR, "name": "", "format": broadcast_format}
 
 
 # TODO: Improve register/unregister clients by implementing decorator
@@ -0,0 +1,144 @@
+import asyncio
+import json
+from logging import getLogger
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from zlib import crc32
+
+from common.utils import DEFAULT_ROOM, MAX_ROOM_NAME_LENGTH
+from utils.metrics import REGISTRY, get_merged_text
+
+logger = getLogger()
+
+WORKER_HOST = "127.0.0.1"
+HTTP_HEADERS_END = b"\r\n\r\n"
+MAX_HTTP_HEADERS_SIZE = 16 * 1024
+PIPE_CHUNK_SIZE = 64 * 1024
+
+
+class RoomRouter:
+    # Front of the multi-process mode: connections are routed to the worker owning
+    # the room, after the HTTP upgrade request the bytes are piped as they are
+    def __init__(self, loop, workers_ports: List[Tuple[int, int]]):
+        self.loop = loop
+        # (websocket port, admin port) of each worker
+        self._workers_ports = workers_ports
+
+    def get_worker_ports(self, room_name: str) -> Tuple[int, int]:
+        worker_index = get_worker_index(room_name, len(self._workers_ports))
+        return self._workers_ports[worker_index]
+
+    async def handle_connection(self, reader, writer):
+        try:
+            request_head = await reader.readuntil(HTTP_HEADERS_END)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+
+        room_name = get_request_room_name(request_head)
+        worker_port, _ = self.get_worker_ports(room_name)
+        try:
+            worker_reader, worker_writer = await asyncio.open_connection(
+                WORKER_HOST, worker_port
+            )
+        except OSError as err:
+            logger.warning(f"Couldn't connect to worker of room '{room_name}': {err}")
+            writer.close()
+            return
+
+        worker_writer.write(request_head)
+        await asyncio.gather(
+            pipe_stream(reader, worker_writer), pipe_stream(worker_reader, writer)
+        )
+
+    async def forward_admin_command(self, func_name, func_args, room_name):
+        # Imported here, only the front process of multi-process mode needs it
+        from aiohttp import ClientSession
+
+        _, admin_port = self.get_worker_ports(room_name)
+        body = {
+            "command": func_name,
+            "args": func_args[0] if func_args else [],
+            "room": room_name,
+        }
+        async with ClientSession() as session:
+            async with session.post(
+                f"http://{WORKER_HOST}:{admin_port}/admin", data=json.dumps(body)
+            ) as response:
+                return await response.text()
+
+    async def forward_navigation_request(
+        self, board_hash: str, room_name: str
+    ) -> Optional[bytes]:
+        from aiohttp import ClientSession
+
+        _, admin_port = self.get_worker_ports(room_name)
+        async with ClientSession() as session:
+            async with session.get(
+                f"http://{WORKER_HOST}:{admin_port}/nav/{board_hash}",
+                params={"room": room_name},
+            ) as response:
+                if response.status == 200:
+                    return await response.read()
+
+    async def get_metrics_text(self) -> str:
+        # Metrics of rooms live in workers, they are served together labeled by
+        # worker index
+        from aiohttp import ClientSession
+
+        async with ClientSession() as session:
+            workers_texts = await asyncio.gather(
+                *(
+                    get_worker_metrics_text(session, admin_port)
+                    for _, admin_port in self._workers_ports
+                )
+            )
+        texts = {"router": REGISTRY.get_text()}
+        for worker_index, worker_text in enumerate(workers_texts):
+            if worker_text is not None:
+                texts[str(worker_index)] = worker_text
+        return get_merged_text(texts, "worker")
+
+    async def start(self, host: str, port: int):
+        return await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_HTTP_HEADERS_SIZE
+        )
+
+
+async def pipe_stream(reader, writer):
+    try:
+        while True:
+            data = await reader.read(PIPE_CHUNK_SIZE)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def get_worker_metrics_text(session, admin_port: int) -> Optional[str]:
+    from aiohttp import ClientError
+
+    try:
+        async with session.get(
+            f"http://{WORKER_HOST}:{admin_port}/metrics"
+        ) as response:
+            if response.status == 200:
+                return await response.text()
+    except ClientError as err:
+        logger.warning(f"Couldn't get metrics of worker on port {admin_port}: {err}")
+
+
+def get_worker_index(room_name: str, workers_number: int) -> int:
+    return crc32(room_name.encode()) % workers_number
+
+
+def get_request_room_name(request_head: bytes) -> str:
+    request_line = request_head.split(b"\r\n", 1)[0].decode("latin-1")
+    request_parts = request_line.split(" ")
+    request_target = request_parts[1] if len(request_parts) > 1 else "/"
+    request_params = parse_qs(urlsplit(request_target).query)
+    return request_params.get("room", [DEFAULT_ROOM])[0][:MAX_ROOM_NAME_LENGTH]
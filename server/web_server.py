@@ -1,23 +1,38 @@
+import asyncio
 import json
 from logging import getLogger
 from os import getcwd
 from os.path import join
 from traceback import format_exc
-from typing import Callable
+from typing import Callable, Optional
 
 import aiohttp_jinja2
 import jinja2
 from aiohttp.web import Application, Response, Request
 
+from common.navigation_cache import NAVIGATION_DATA_VERSION
+from common.utils import DEFAULT_ROOM
+from utils.metrics import REGISTRY
+
 TEMPLATES_DIR = "templates"
+# Navigation data is addressed by board hash, so it never changes under its URL
+NAVIGATION_DATA_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 logger = getLogger()
 
 
 class WebApp(Application):
-    def __init__(self, loop, admin_command_func: Callable):
+    def __init__(
+        self,
+        loop,
+        admin_command_func: Callable,
+        navigation_data_func: Optional[Callable] = None,
+        metrics_func: Optional[Callable] = None,
+    ):
         super().__init__(loop=loop)
         self._admin_command_func = admin_command_func
+        self._navigation_data_func = navigation_data_func
+        self._metrics_func = metrics_func
 
         html_resource = self.router.add_resource("/")
         html_resource.add_route("GET", self.reg)
@@ -30,6 +45,12 @@ class WebApp(Application):
         admin_resource.add_route("POST", self.admin_command)
         admin_resource.add_route("GET", self.admin_page)
 
+        metrics_resource = self.router.add_resource("/metrics")
+        metrics_resource.add_route("GET", self.metrics)
+
+        navigation_resource = self.router.add_resource("/nav/{board_hash}")
+        navigation_resource.add_route("GET", self.navigation_data)
+
         aiohttp_jinja2.setup(
             self, loader=jinja2.FileSystemLoader(join(getcwd(), TEMPLATES_DIR))
         )
@@ -56,8 +77,11 @@ class WebApp(Application):
             func_args = raw_body.get("args", [])
             if func_args:
                 func_args = [func_args]
+            room_name = raw_body.get("room") or DEFAULT_ROOM
 
-            result = self._admin_command_func(func_name, func_args)
+            result = self._admin_command_func(func_name, func_args, room_name)
+            if asyncio.iscoroutine(result):
+                result = await result
             return Response(text=str(result))
         except Exception as err:
             logger.error(str(format_exc()))
@@ -68,3 +92,31 @@ class WebApp(Application):
         context = {}
         response = aiohttp_jinja2.render_template("admin.html", request, context)
         return response
+
+    async def metrics(self, request):
+        if self._metrics_func is None:
+            metrics_text = REGISTRY.get_text()
+        else:
+            metrics_text = await self._metrics_func()
+        return Response(text=metrics_text, content_type="text/plain")
+
+    async def navigation_data(self, request: Request):
+        board_hash = request.match_info["board_hash"]
+        etag = f'"{NAVIGATION_DATA_VERSION}-{board_hash}"'
+        headers = {"ETag": etag, "Cache-Control": NAVIGATION_DATA_CACHE_CONTROL}
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status=304, headers=headers)
+
+        navigation_data = None
+        if self._navigation_data_func is not None:
+            room_name = request.query.get("room") or DEFAULT_ROOM
+            navigation_data = self._navigation_data_func(board_hash, room_name)
+            if asyncio.iscoroutine(navigation_data):
+                navigation_data = await navigation_data
+        if navigation_data is None:
+            return Response(text=f"Board {board_hash} isn't played", status=404)
+        return Response(
+            body=navigation_data,
+            content_type="application/octet-stream",
+            headers=headers,
+        )
@@ -1,9 +1,23 @@
 import asyncio
 from argparse import ArgumentParser
+from logging import getLogger
+from multiprocessing import Process
 
-from game.game_board import GameBoard
+from common.navigation import DEFAULT_DISTANCE_FIELDS_MEMORY_LIMIT
+from common.navigation_cache import NAVIGATION_CACHE_DIR
+from game.game_board import GameBoard, HIERARCHICAL_NAVIGATION_MIN_BLOCKS
 from game.game_session import LodeRunnerGameSession
-from server.game_server import BroadcastServerFactory, BroadcastServerProtocol
+from game.tick_scheduler import (
+    SKIP_POLICY,
+    TICK_OVERRUN_POLICIES,
+    SharedTickScheduler,
+)
+from server.game_server import (
+    MAX_ROOMS_NUMBER,
+    BroadcastServerFactory,
+    BroadcastServerProtocol,
+)
+from server.room_router import WORKER_HOST, RoomRouter
 from server.web_server import WebApp
 from utils.configure_logging import setup_logging
 
@@ -11,28 +25,60 @@ GAME_SERVER_WEB_SOCKET_URL = "ws://0.0.0.0"
 GAME_SERVER_WEB_SOCKET_PORT = 9000
 FRONTEND_PORT = 8080
 DEBUG = False
+MEGABYTE = 1024 * 1024
+WORKERS_BASE_PORT = 9100
+
+logger = getLogger()
 
 
 def main():
     cmd_args = get_cmd_args()
     setup_logging(cmd_args.log_level)
+    if cmd_args.workers_number > 0:
+        run_router(cmd_args)
+    else:
+        configure_game(cmd_args)
+        run_game_server(cmd_args, "0.0.0.0", cmd_args.port, "0.0.0.0", FRONTEND_PORT)
+
+
+def configure_game(cmd_args):
+    GameBoard.distance_fields_memory_limit = (
+        cmd_args.distance_fields_memory_limit * MEGABYTE
+    )
+    GameBoard.navigation_cache_dir = cmd_args.navigation_cache_dir or None
+    GameBoard.navigation_cache_fields = cmd_args.navigation_cache_fields
+    GameBoard.hierarchical_navigation_min_blocks = (
+        cmd_args.hierarchical_navigation_min_blocks
+    )
+    LodeRunnerGameSession.tick_overrun_policy = cmd_args.tick_overrun_policy
+    BroadcastServerFactory.max_rooms_number = cmd_args.max_rooms_number
+    LodeRunnerGameSession.replays_dir = cmd_args.replays_dir or None
+    if cmd_args.guards_planning_deadline:
+        LodeRunnerGameSession.guards_planning_deadline = (
+            cmd_args.guards_planning_deadline / 1000
+        )
 
-    loop = asyncio.get_event_loop()
 
-    game_session = get_game_session(loop)
+def run_game_server(cmd_args, host, port, web_host, web_port):
+    loop = asyncio.get_event_loop()
+    tick_scheduler = SharedTickScheduler(loop)
 
+    # Clients always see the public port in the Host header, workers included
     game_factory = BroadcastServerFactory(
-        url=f"{GAME_SERVER_WEB_SOCKET_URL}:{cmd_args.port}", game_session=game_session
+        url=f"{GAME_SERVER_WEB_SOCKET_URL}:{cmd_args.port}",
+        game_session_factory=lambda: get_game_session(loop, tick_scheduler),
     )
     game_factory.protocol = BroadcastServerProtocol
 
     game_ws_server = loop.run_until_complete(
-        loop.create_server(game_factory, "0.0.0.0", cmd_args.port)
+        loop.create_server(game_factory, host, port)
     )
 
-    web_app = WebApp(loop, game_session.run_admin_command)
+    web_app = WebApp(
+        loop, game_factory.run_admin_command, game_factory.get_navigation_data
+    )
     web_server = loop.run_until_complete(
-        loop.create_server(web_app.make_handler(), "0.0.0.0", FRONTEND_PORT)
+        loop.create_server(web_app.make_handler(), web_host, web_port)
     )
 
     try:
@@ -45,9 +91,56 @@ def main():
         loop.close()
 
 
-def get_game_session(loop):
+def run_worker(cmd_args, port, admin_port):
+    setup_logging(cmd_args.log_level)
+    configure_game(cmd_args)
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    run_game_server(cmd_args, WORKER_HOST, port, WORKER_HOST, admin_port)
+
+
+def run_router(cmd_args):
+    workers_ports = [
+        (cmd_args.workers_base_port + 2 * idx, cmd_args.workers_base_port + 2 * idx + 1)
+        for idx in range(cmd_args.workers_number)
+    ]
+    workers = [
+        Process(target=run_worker, args=(cmd_args, *worker_ports), daemon=True)
+        for worker_ports in workers_ports
+    ]
+    for worker in workers:
+        worker.start()
+    logger.info(f"Started {len(workers)} game server workers")
+
+    loop = asyncio.get_event_loop()
+    router = RoomRouter(loop, workers_ports)
+    router_server = loop.run_until_complete(router.start("0.0.0.0", int(cmd_args.port)))
+
+    web_app = WebApp(
+        loop,
+        router.forward_admin_command,
+        router.forward_navigation_request,
+        router.get_metrics_text,
+    )
+    web_server = loop.run_until_complete(
+        loop.create_server(web_app.make_handler(), "0.0.0.0", FRONTEND_PORT)
+    )
+
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        router_server.close()
+        web_server.close()
+        loop.close()
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+
+
+def get_game_session(loop, tick_timer=None):
     game_board = GameBoard.from_blocks_number()
-    return LodeRunnerGameSession(loop, game_board)
+    return LodeRunnerGameSession(loop, game_board, tick_timer)
 
 
 def get_cmd_args():
@@ -62,7 +155,80 @@ def get_cmd_args():
         choices=["INFO", "DEBUG"],
         default="DEBUG" if DEBUG else "INFO",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--distance_fields_memory_limit",
+        dest="distance_fields_memory_limit",
+        type=int,
+        default=DEFAULT_DISTANCE_FIELDS_MEMORY_LIMIT // MEGABYTE,
+        help="Memory limit of cached guards distance fields, MB",
+    )
+    parser.add_argument(
+        "--navigation_cache_dir",
+        dest="navigation_cache_dir",
+        default=NAVIGATION_CACHE_DIR,
+        help="Directory of precomputed navigation data, empty string disables it",
+    )
+    parser.add_argument(
+        "--navigation_cache_fields",
+        dest="navigation_cache_fields",
+        action="store_true",
+        help="Also cache guards distance fields on disk, up to 2 * cells^2 bytes "
+        "per board",
+    )
+    parser.add_argument(
+        "--hierarchical_navigation_min_blocks",
+        dest="hierarchical_navigation_min_blocks",
+        type=int,
+        default=HIERARCHICAL_NAVIGATION_MIN_BLOCKS,
+        help="Minimal board blocks number for block level guards pathfinding, "
+        "0 disables it",
+    )
+    parser.add_argument(
+        "--tick_overrun_policy",
+        dest="tick_overrun_policy",
+        choices=TICK_OVERRUN_POLICIES,
+        default=SKIP_POLICY,
+        help="Whether ticks missed after a slow tick are skipped or caught up",
+    )
+    parser.add_argument(
+        "--guards_planning_deadline",
+        dest="guards_planning_deadline",
+        type=float,
+        default=0,
+        help="Milliseconds a tick waits for guards planned in another process, "
+        "0 plans them inline",
+    )
+    parser.add_argument(
+        "--replays_dir",
+        dest="replays_dir",
+        default="",
+        help="Record replays of game sessions to this directory",
+    )
+    parser.add_argument(
+        "--max_rooms_number",
+        dest="max_rooms_number",
+        type=int,
+        default=MAX_ROOMS_NUMBER,
+        help="Maximal number of game rooms served by the process",
+    )
+    parser.add_argument(
+        "--workers_number",
+        dest="workers_number",
+        type=int,
+        default=0,
+        help="Number of game server processes behind a room router, 0 disables it",
+    )
+    parser.add_argument(
+        "--workers_base_port",
+        dest="workers_base_port",
+        type=int,
+        default=WORKERS_BASE_PORT,
+        help="First localhost port of workers, each one takes two ports",
+    )
+    cmd_args = parser.parse_args()
+    if cmd_args.replays_dir and cmd_args.guards_planning_deadline:
+        parser.error("Replays can't be recorded with timed guards planning")
+    return cmd_args
 
 
 if __name__ == "__main__":
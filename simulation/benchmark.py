@@ -0,0 +1,109 @@
+import json
+from itertools import product
+from typing import Any, Dict, List
+
+from common.utils import JSON_FORMAT
+from game.game_session import TICK_PHASES
+from simulation.headless_session import BOT_PLAYER, HeadlessSimulation
+
+DEFAULT_BENCHMARK_TICKS = 200
+DEFAULT_MAX_REGRESSION = 0.2
+
+
+def run_benchmark_case(
+    blocks_number: int,
+    guards_number: int,
+    players_number: int,
+    ticks_number: int = DEFAULT_BENCHMARK_TICKS,
+    player_kind: str = BOT_PLAYER,
+    broadcast_format: str = JSON_FORMAT,
+    random_seed: int = 0,
+) -> Dict[str, Any]:
+    simulation = HeadlessSimulation(
+        blocks_number,
+        guards_number,
+        players_number,
+        player_kind=player_kind,
+        broadcast_format=broadcast_format,
+        random_seed=random_seed,
+    )
+    simulation.enable_phases_timing()
+    duration = simulation.run(ticks_number)
+    ticks_number = max(1, simulation.ticks_number)
+    return {
+        "case": get_case_name(blocks_number, guards_number, players_number),
+        "ticks_per_second": round(ticks_number / duration, 1) if duration else 0,
+        "tick": get_benchmark_milliseconds(duration / ticks_number),
+        "phases": {
+            phase: get_benchmark_milliseconds(phases_duration / ticks_number)
+            for phase, phases_duration in simulation.phases_durations.items()
+        },
+        **simulation.get_stats(),
+    }
+
+
+def run_benchmark(
+    blocks_numbers: List[int],
+    guards_numbers: List[int],
+    players_numbers: List[int],
+    **case_kwargs,
+) -> List[Dict[str, Any]]:
+    return [
+        run_benchmark_case(blocks_number, guards_number, players_number, **case_kwargs)
+        for blocks_number, guards_number, players_number in product(
+            blocks_numbers, guards_numbers, players_numbers
+        )
+    ]
+
+
+def get_benchmark_milliseconds(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def get_case_name(blocks_number: int, guards_number: int, players_number: int) -> str:
+    return f"blocks={blocks_number} guards={guards_number} players={players_number}"
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    header = ["case", "ticks/s", "tick ms"] + TICK_PHASES
+    rows = [header] + [
+        [result["case"], str(result["ticks_per_second"]), str(result["tick"])]
+        + [str(result["phases"][phase]) for phase in TICK_PHASES]
+        for result in results
+    ]
+    widths = [max(len(row[column]) for row in rows) for column in range(len(header))]
+    return "\n".join(
+        "  ".join(value.ljust(width) for value, width in zip(row, widths))
+        for row in rows
+    )
+
+
+def save_results(results: List[Dict[str, Any]], file_path: str):
+    with open(file_path, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+
+
+def load_results(file_path: str) -> List[Dict[str, Any]]:
+    with open(file_path) as results_file:
+        return json.load(results_file)
+
+
+def get_regressions(
+    results: List[Dict[str, Any]],
+    baseline_results: List[Dict[str, Any]],
+    max_regression: float = DEFAULT_MAX_REGRESSION,
+) -> List[str]:
+    baseline_ticks_rates = {
+        result["case"]: result["ticks_per_second"] for result in baseline_results
+    }
+    regressions = []
+    for result in results:
+        baseline_ticks_rate = baseline_ticks_rates.get(result["case"])
+        if not baseline_ticks_rate:
+            continue
+        if result["ticks_per_second"] < baseline_ticks_rate * (1 - max_regression):
+            regressions.append(
+                f"{result['case']}: {result['ticks_per_second']} ticks/s, "
+                f"baseline {baseline_ticks_rate} ticks/s"
+            )
+    return regressions
@@ -0,0 +1,179 @@
+from random import Random
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+from common.utils import (
+    PLAYER,
+    SPECTATOR,
+    JSON_FORMAT,
+    Drill,
+    Move,
+    get_next_target_age,
+)
+from game.game_board import GameBoard
+from game.game_session import TICK_PHASES, LodeRunnerGameSession
+from game.tick_scheduler import ScheduledTick
+
+HEADLESS_SESSION_TIMESPAN = 10 ** 9
+SCRIPTED_PLAYER = "scripted"
+BOT_PLAYER = "bot"
+PLAYER_KINDS = (SCRIPTED_PLAYER, BOT_PLAYER)
+
+
+class HeadlessClient:
+    # Stands for a websocket protocol in clients info, keeps only message stats
+    def __init__(self, client_type: str, name: str, broadcast_format: str):
+        self.client_info = {
+            "client_type": client_type,
+            "name": name,
+            "format": broadcast_format,
+        }
+        self.messages_number = 0
+        self.bytes_number = 0
+        self.last_message = None
+
+    def sendMessage(self, payload, isBinary=False):
+        self.messages_number += 1
+        self.bytes_number += len(payload)
+        self.last_message = payload
+
+    def sendClose(self):
+        pass
+
+
+class VirtualTickTimer:
+    # Takes the place of the event loop: time moves on only when a tick is run,
+    # so ticks follow each other without waiting and never overrun
+    def __init__(self):
+        self.now = 0.0
+        self._scheduled: Optional[Tuple[float, ScheduledTick]] = None
+
+    def time(self) -> float:
+        return self.now
+
+    def call_at(self, when: float, callback: Callable) -> ScheduledTick:
+        scheduled_tick = ScheduledTick(callback)
+        self._scheduled = (when, scheduled_tick)
+        return scheduled_tick
+
+    def run_next(self) -> bool:
+        if self._scheduled is None:
+            return False
+        when, scheduled_tick = self._scheduled
+        self._scheduled = None
+        if scheduled_tick.is_cancelled:
+            return False
+        self.now = max(self.now, when)
+        scheduled_tick.callback()
+        return True
+
+
+class ScriptedController:
+    def __init__(self, rng: Random):
+        self._rng = rng
+        self._actions = Move.get_valid_codes() + Drill.get_valid_codes()
+
+    def get_action(self, board: GameBoard, cell: Tuple[int, int]) -> str:
+        return self._rng.choice(self._actions)
+
+
+class BotController(ScriptedController):
+    # Walks to the nearest gold over the server navigator, like client bots do
+    def get_action(self, board: GameBoard, cell: Tuple[int, int]) -> str:
+        next_target_age = get_next_target_age(board.navigator, board.gold_cells, cell)
+        if next_target_age and next_target_age[0]:
+            return Move.get_move_from_start_end_cells(cell, next_target_age[0])
+        return super().get_action(board, cell)
+
+
+class HeadlessSimulation:
+    def __init__(
+        self,
+        blocks_number: int,
+        guards_number: int,
+        players_number: int,
+        player_kind: str = BOT_PLAYER,
+        broadcast_format: str = JSON_FORMAT,
+        random_seed: int = 0,
+        spectators_number: int = 1,
+    ):
+        self._rng = Random(random_seed)
+        self.board = GameBoard.from_blocks_number(blocks_number, random_seed)
+        self.timer = VirtualTickTimer()
+        self.session = LodeRunnerGameSession(self.timer, self.board)
+        self.clients_info: Dict[UUID, HeadlessClient] = {}
+        self.session.init(self.clients_info, lambda: None)
+        self.session.run_admin_command("update_guards_number", [guards_number])
+
+        controller_cls = (
+            BotController if player_kind == BOT_PLAYER else ScriptedController
+        )
+        self.controllers: Dict[UUID, ScriptedController] = {}
+        for idx in range(players_number):
+            player_id = self._get_client_id()
+            name = f"{player_kind}-{idx}"
+            self.clients_info[player_id] = HeadlessClient(
+                PLAYER, name, broadcast_format
+            )
+            self.session.register_participant(player_id, name, PLAYER)
+            self.controllers[player_id] = controller_cls(self._rng)
+        for idx in range(spectators_number):
+            self.clients_info[self._get_client_id()] = HeadlessClient(
+                SPECTATOR, f"{SPECTATOR}-{idx}", broadcast_format
+            )
+
+        self.phases_durations: Dict[str, float] = {phase: 0.0 for phase in TICK_PHASES}
+        self.ticks_number = 0
+        self.session.run_admin_command(
+            "set_session_timespan", [HEADLESS_SESSION_TIMESPAN]
+        )
+        self.session.run_admin_command("start", [])
+
+    def _get_client_id(self) -> UUID:
+        return UUID(int=self._rng.getrandbits(128), version=4)
+
+    def enable_phases_timing(self):
+        for phase in TICK_PHASES:
+            setattr(self.session, phase, self._get_timed_phase(phase))
+
+    def _get_timed_phase(self, phase: str) -> Callable:
+        phase_func = getattr(self.session, phase)
+
+        def timed_phase(*args, **kwargs):
+            start_time = perf_counter()
+            result = phase_func(*args, **kwargs)
+            self.phases_durations[phase] += perf_counter() - start_time
+            return result
+
+        return timed_phase
+
+    def run(self, ticks_number: int) -> float:
+        # Players decide outside of the measured time, only ticks are counted
+        ticks_duration = 0.0
+        for _ in range(ticks_number):
+            self.queue_players_actions()
+            start_time = perf_counter()
+            is_ticked = self.timer.run_next()
+            ticks_duration += perf_counter() - start_time
+            if not is_ticked:
+                break
+            self.ticks_number += 1
+        return ticks_duration
+
+    def queue_players_actions(self):
+        for player_id, controller in self.controllers.items():
+            hero_info = self.session.get_hero_info(player_id)
+            if hero_info:
+                action = controller.get_action(self.board, (hero_info[0], hero_info[1]))
+                self.session.queue_action(action, player_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ticks": self.ticks_number,
+            "score": sum(self.session.score_info.values()),
+            "messages": sum(
+                client.messages_number for client in self.clients_info.values()
+            ),
+            "bytes": sum(client.bytes_number for client in self.clients_info.values()),
+        }
@@ -0,0 +1,66 @@
+from time import perf_counter
+from typing import BinaryIO, Dict
+from uuid import UUID
+
+from common.utils import JSON_FORMAT
+from game.game_board import GameBoard
+from game.game_session import LodeRunnerGameSession
+from game.replay import (
+    REGISTER_EVENT,
+    UNREGISTER_EVENT,
+    ADMIN_COMMAND_EVENT,
+    TICK_EVENT,
+    read_replay_events,
+    read_replay_header,
+)
+from simulation.headless_session import HeadlessClient, VirtualTickTimer
+
+
+class ReplaySession:
+    # Re-runs a recorded session without waiting for ticks
+    def __init__(self, replay_file: BinaryIO, broadcast_format: str = JSON_FORMAT):
+        random_seed, board_layers = read_replay_header(replay_file)
+        self._events = read_replay_events(replay_file)
+        self._broadcast_format = broadcast_format
+        self.board = GameBoard(board_layers, random_seed)
+        self.timer = VirtualTickTimer()
+        self.session = LodeRunnerGameSession(self.timer, self.board)
+        self.clients_info: Dict[UUID, HeadlessClient] = {}
+        self.session.init(self.clients_info, lambda: None)
+        self._participants_ids: Dict[int, UUID] = {}
+        self.ticks_number = 0
+
+    def run(self) -> float:
+        ticks_duration = 0.0
+        for event in self._events:
+            event_type = event[0]
+            if event_type == TICK_EVENT:
+                for participant_index, action in event[1]:
+                    self.session.queue_action(
+                        action, self._participants_ids[participant_index]
+                    )
+                start_time = perf_counter()
+                self.timer.run_next()
+                ticks_duration += perf_counter() - start_time
+                self.ticks_number += 1
+            elif event_type == REGISTER_EVENT:
+                self._register_participant(*event[1:])
+            elif event_type == UNREGISTER_EVENT:
+                self._unregister_participant(event[1])
+            elif event_type == ADMIN_COMMAND_EVENT:
+                self.session.run_admin_command(event[1], event[2])
+        return ticks_duration
+
+    def _register_participant(self, participant_index, participant_type, name):
+        participant_id = UUID(int=participant_index + 1)
+        self._participants_ids[participant_index] = participant_id
+        self.clients_info[participant_id] = HeadlessClient(
+            participant_type, name, self._broadcast_format
+        )
+        self.session.register_participant(participant_id, name, participant_type)
+
+    def _unregister_participant(self, participant_index):
+        participant_id = self._participants_ids.pop(participant_index)
+        self.clients_info.pop(participant_id)
+        self.session.reset_client_delta(participant_id)
+        self.session.unregister_participant(participant_id)
@@ -1,7 +1,8 @@
 const GAME_PORT = '9000';
 const HOSTNAME = window.location.hostname;
 const GAME_URL = "ws://" + HOSTNAME + ":" + GAME_PORT;
-const ADMIN_SOCKET_URL = GAME_URL + "?client_type=Admin";
+const ROOM = new URLSearchParams(window.location.search).get('room') || 'default';
+const ADMIN_SOCKET_URL = GAME_URL + "?client_type=Admin&room=" + encodeURIComponent(ROOM);
 const ADMIN_URL = '/admin';
 const IS_RUNNING = 'is_running';
 const IS_PAUSED = 'is_paused';
@@ -11,6 +12,7 @@ const GOLD = 'gold';
 const TICK = 'tick';
 const TIMESPAN = 'timespan';
 const TIMER = 'timer';
+const TICK_STATS = 'tick_stats';
 const DEFAULT_RECONNECTION_RETRY_COUNT = 10;
 const RECONNECTION_RETRY_TIMEOUT = 1000;
 const PLAYERS_LIST_ID = 'players';
@@ -41,7 +43,8 @@ function showPlayers(players) {
 function getCommandBody(command, args) {
     return JSON.stringify({
         "command": command,
-        "args": args
+        "args": args,
+        "room": ROOM
     })
 }
 
@@ -163,7 +166,12 @@ class AdminPanel {
     }
 
     update(sessionInfo) {
-        this.mainGroup.update(sessionInfo[IS_RUNNING], sessionInfo[IS_PAUSED], sessionInfo[TIMER]);
+        this.mainGroup.update(
+            sessionInfo[IS_RUNNING],
+            sessionInfo[IS_PAUSED],
+            sessionInfo[TIMER],
+            sessionInfo[TICK_STATS]
+        );
         for (let key in this.groupsInfo) {
             this.groupsInfo[key].updateValue(sessionInfo[key])
         }
@@ -222,9 +230,10 @@ class MainGroup {
             this.pauseResumeToggleInfo
         );
         this.displayTimerButton = document.createElement('button');
+        this.tickStatsNode = document.createElement('span');
     }
 
-    update(isRunning, isPaused, timerValue) {
+    update(isRunning, isPaused, timerValue, tickStats) {
         if (isRunning) {
             this.startStopButton.innerText = this.startStopToggleInfo.offText
         } else {
@@ -240,6 +249,12 @@ class MainGroup {
             this.pauseResumeButton.innerText = this.pauseResumeToggleInfo.offText
         }
         this.displayTimerButton.innerText = timerValue;
+        if (tickStats) {
+            this.tickStatsNode.innerText =
+                ` Tick: ${tickStats.duration} ms (max ${tickStats.max_duration}),` +
+                ` jitter: ${tickStats.jitter} ms (max ${tickStats.max_jitter}),` +
+                ` overruns: ${tickStats.overruns}, skipped: ${tickStats.skipped}`;
+        }
     }
 
     get node() {
@@ -247,6 +262,7 @@ class MainGroup {
         group.appendChild(this.startStopButton);
         group.appendChild(this.pauseResumeButton);
         group.appendChild(this.displayTimerButton);
+        group.appendChild(this.tickStatsNode);
         return group
     }
 
@@ -4,10 +4,16 @@ const SCORE = 'score';
 const PLAYERS = 'players';
 const NAMES = 'names';
 const SIZE = 'size';
+const DIFF = 'diff';
+const HERO = 'hero';
+const TICK = 'tick';
+const BOARD_FRAME_HEADER_SIZE = 12;
+const RLE_FLAG = 0x01;
+const RESYNC = 'Resync';
 const hostname = window.location.hostname;
 const url = "ws://" + hostname + ":" + game_port;
 const WEB_SOCKET_CONNECT_TIMEOUT = 500;  // NOTE: workaround to handle async websocket and webpage
-const gameBoardSocketUrl = url + "?client_type=Player&name=" + getUrlValue('user');
+const gameBoardSocketUrl = url + "?client_type=Player&format=" + (getUrlValue('format') || 'delta') + "&name=" + getUrlValue('user') + "&room=" + (getUrlValue('room') || 'default');
 const cellSize = 20;
 const baselWidth = 10;
 const scorePaneSize = 400;
@@ -60,6 +66,7 @@ let boardSize;
 let canvasCtx;
 let reconnectionRetryCount;
 let sessionInfo;
+let playersInfo;
 
 
 function getCellsInfo() {
@@ -88,10 +95,9 @@ function getUrlValue(varSearch) {
         let keyValuePair = variableArray[index].split('=');
         if (keyValuePair[0] === varSearch) {
             return keyValuePair[1];
-        } else {
-            return ''
         }
     }
+    return ''
 }
 
 function websocketGame() {
@@ -111,8 +117,28 @@ function websocketGame() {
 function gameBoardSocketManager() {
     let gameBoardSocket = new WebSocket(gameBoardSocketUrl);
 
+    gameBoardSocket.binaryType = 'arraybuffer';
     gameBoardSocket.onmessage = (event) => {
-        sessionInfo = JSON.parse(event.data);
+        let message;
+        if (event.data instanceof ArrayBuffer) {
+            message = decodeBoardFrame(event.data);
+        } else {
+            message = JSON.parse(event.data);
+            playersInfo = message[PLAYERS];
+            if (!(BOARD in message) && !(DIFF in message)) {
+                return
+            }
+            if (!(BOARD in message)) {
+                if (!sessionInfo || sessionInfo[SIZE] !== message[SIZE]) {
+                    gameBoardSocket.send(RESYNC);
+                    return
+                }
+                applyBoardDiff(sessionInfo[BOARD], message[DIFF]);
+                message[BOARD] = sessionInfo[BOARD];
+            }
+        }
+        message[PLAYERS] = playersInfo;
+        sessionInfo = message;
         if (!boardSize) {
             boardSize = sessionInfo[SIZE]
         }
@@ -139,6 +165,44 @@ function gameBoardSocketManager() {
     return gameBoardSocket
 }
 
+function applyBoardDiff(board, boardDiff) {
+    let size = board.length;
+    for (let [cellIndex, cellCode] of Object.entries(boardDiff)) {
+        board[Math.floor(cellIndex / size)][cellIndex % size] = cellCode;
+    }
+}
+
+function decodeBoardFrame(buffer) {
+    let view = new DataView(buffer);
+    let flags = view.getUint8(0);
+    let size = view.getUint16(1);
+    let heroCode = view.getUint8(11);
+    let body = new Uint8Array(buffer, BOARD_FRAME_HEADER_SIZE);
+    if (flags & RLE_FLAG) {
+        body = decodeRle(body, size * size);
+    }
+    let board = [];
+    for (let y = 0; y < size; y++) {
+        board.push(Array.from(body.subarray(y * size, (y + 1) * size), code => String.fromCharCode(code)));
+    }
+    let frame = {};
+    frame[BOARD] = board;
+    frame[SIZE] = size;
+    frame[TICK] = view.getUint32(3);
+    frame[HERO] = heroCode ? [view.getUint16(7), view.getUint16(9), String.fromCharCode(heroCode)] : null;
+    return frame
+}
+
+function decodeRle(body, length) {
+    let decoded = new Uint8Array(length);
+    let offset = 0;
+    for (let idx = 0; idx < body.length; idx += 2) {
+        decoded.fill(body[idx + 1], offset, offset + body[idx]);
+        offset += body[idx];
+    }
+    return decoded
+}
+
 function setCanvasContext() {
     if (canvasCtx) {
         let canvas = document.getElementById('canvas');
@@ -181,6 +245,14 @@ function showGameBoard() {
             );
         }
     }
+    let heroInfo = sessionInfo[HERO];
+    if (heroInfo) {
+        canvasCtx.drawImage(
+            cells_info[heroInfo[2]],
+            heroInfo[0] * cellSize + baselWidth,
+            heroInfo[1] * cellSize + baselWidth
+        );
+    }
     canvasCtx.beginPath();
     canvasCtx.lineWidth = baselWidth;
     canvasCtx.strokeStyle = "blue";
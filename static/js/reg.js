@@ -1,7 +1,8 @@
 const ADMIN_URL = '/admin';
+const ROOM = new URLSearchParams(window.location.search).get('room') || 'default';
 
 function spectator() {
-    $(location).attr("href", "/play");
+    $(location).attr("href", "/play?room=" + encodeURIComponent(ROOM));
 }
 
 function check_user_name() {
@@ -10,10 +11,14 @@ function check_user_name() {
         getCommandBody("check_user_name", name),
         (data) => {
             if (data === 'False') {
-                $(location).attr("href", "/play?user=" + name);
+                $(location).attr(
+                    "href",
+                    "/play?user=" + name + "&room=" + encodeURIComponent(ROOM)
+                );
+            } else if (data === 'True') {
+                alert("User name " + name + " is already registered");
             } else {
                 alert(data);
-                alert("User name " + name + " is already registered");
             }
         }
     );
@@ -45,6 +50,7 @@ function sendAdminCommand(body, callback) {
 function getCommandBody(command, args) {
     return JSON.stringify({
         "command": command,
-        "args": args
+        "args": args,
+        "room": ROOM
     })
 }
\ No newline at end of file
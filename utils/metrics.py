@@ -0,0 +1,206 @@
+from bisect import bisect_left
+from itertools import chain
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, "Metric"] = {}
+
+    def register(self, metric: "Metric"):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+
+    def get_text(self) -> str:
+        # Prometheus text exposition format
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.get_lines())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class GaugeValue(CounterValue):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class HistogramValue:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        # Last count is for the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Metric:
+    metric_type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Iterable[str] = (),
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        registry.register(self)
+
+    def labels(self, *label_values: str):
+        value = self._values.get(label_values)
+        if value is None:
+            if len(label_values) != len(self.label_names):
+                raise ValueError(f"Metric '{self.name}' expects {self.label_names}")
+            value = self._values[label_values] = self._get_new_value()
+        return value
+
+    def _get_new_value(self):
+        raise NotImplementedError
+
+    def get_lines(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        for label_values, value in self._values.items():
+            labels = dict(zip(self.label_names, label_values))
+            lines.extend(self._get_value_lines(labels, value))
+        return lines
+
+    def _get_value_lines(self, labels: Dict[str, str], value) -> List[str]:
+        return [f"{self.name}{get_labels_text(labels)} {format_number(value.value)}"]
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def _get_new_value(self) -> CounterValue:
+        return CounterValue()
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def _get_new_value(self) -> GaugeValue:
+        return GaugeValue()
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Iterable[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, label_names, registry)
+
+    def _get_new_value(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def _get_value_lines(self, labels: Dict[str, str], value: HistogramValue):
+        lines = []
+        cumulative_count = 0
+        for bucket, count in zip(self.buckets + (float("inf"),), value.counts):
+            cumulative_count += count
+            bucket_labels = {**labels, "le": format_number(bucket)}
+            lines.append(
+                f"{self.name}_bucket{get_labels_text(bucket_labels)} {cumulative_count}"
+            )
+        labels_text = get_labels_text(labels)
+        lines.append(f"{self.name}_sum{labels_text} {format_number(value.sum)}")
+        lines.append(f"{self.name}_count{labels_text} {cumulative_count}")
+        return lines
+
+
+def get_merged_text(texts: Dict[str, str], label_name: str) -> str:
+    # Expositions of several processes as one, samples are labeled by process
+    families: Dict[str, List[str]] = {}
+    family_lines: List[str] = []
+    for label_value, text in texts.items():
+        for line in text.splitlines():
+            if line.startswith("# "):
+                family_lines = families.setdefault(line.split(" ", 3)[2], [])
+                if line not in family_lines:
+                    family_lines.append(line)
+            elif line:
+                family_lines.append(get_labeled_sample(line, label_name, label_value))
+    return "\n".join(chain.from_iterable(families.values())) + "\n"
+
+
+def get_labeled_sample(line: str, label_name: str, label_value: str) -> str:
+    sample_name, sample_value = line.rsplit(" ", 1)
+    label = f'{label_name}="{escape_label_value(label_value)}"'
+    if sample_name.endswith("}"):
+        return f"{sample_name[:-1]},{label}}} {sample_value}"
+    return f"{sample_name}{{{label}}} {sample_value}"
+
+
+def get_labels_text(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    labels_items = ",".join(
+        f'{label_name}="{escape_label_value(label_value)}"'
+        for label_name, label_value in labels.items()
+    )
+    return f"{{{labels_items}}}"
+
+
+def escape_label_value(label_value) -> str:
+    return (
+        str(label_value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def format_number(number: float) -> str:
+    if number == float("inf"):
+        return "+Inf"
+    if float(number).is_integer():
+        return str(int(number))
+    return repr(float(number))